@@ -1,16 +1,48 @@
-from collections.abc import AsyncGenerator
+import asyncio
+import contextlib
+from collections.abc import AsyncGenerator, Iterator
 
+import numpy as np
 import pandas as pd
 from google.genai import types
 from openinference.instrumentation import using_attributes
 
 from src.agent.gemini_client import get_client
-from src.agent.system_prompts import get_active_prompt
-from src.agent.tools import TOOL_DECLARATIONS, TOOL_FUNCTIONS
+from src.agent.system_prompts import PromptVersion, get_active_prompt
+from src.agent.tools import TOOL_DECLARATIONS, TOOL_FUNCTIONS, dive_key
 from src.analysis.feature_engineering import extract_features
 from src.config import settings
 from src.observability import get_tracer
 
+# Repeated per-sample labels, dictionary-encoded when a log is loaded
+_LABEL_COLUMNS = ("dive_number", "dive_site_name", "trip_name")
+
+_TOOLS = [types.Tool(function_declarations=TOOL_DECLARATIONS)]
+
+# Tools that take the dive data, by how much of the log they need
+_SINGLE_DIVE_TOOLS = frozenset({"analyze_dive_profile", "get_dive_summary"})
+_FULL_LOG_TOOLS = frozenset({"list_dives", "analyze_all_dives"})
+
+
+def _prompt_span_attributes(prompt_ver: PromptVersion) -> dict[str, str | int]:
+    """Span attributes identifying the prompt version behind a chat turn."""
+    attrs: dict[str, str | int] = {
+        "openinference.span.kind": "CHAIN",
+        "prompt.version": prompt_ver.version,
+        "prompt.label": prompt_ver.label,
+    }
+    if prompt_ver.phoenix_version_id:
+        attrs["prompt.phoenix_version_id"] = prompt_ver.phoenix_version_id
+    return attrs
+
+
+def _generation_config(prompt_ver: PromptVersion) -> types.GenerateContentConfig:
+    return types.GenerateContentConfig(
+        system_instruction=prompt_ver.prompt,
+        tools=_TOOLS,
+        temperature=0.8,
+    )
+
 
 class DiverRoastAgent:
     """Manages conversation state and tool dispatch for the diver roasting agent."""
@@ -19,6 +51,15 @@ class DiverRoastAgent:
         self._client = None
         self.history: list[types.Content] = []
         self.dive_data: pd.DataFrame | None = None
+        self.features: pd.DataFrame | None = None
+        self._per_dive_data: dict[str, pd.DataFrame] = {}
+        self._dive_list: str | None = None
+        self._dive_summaries: dict[str, str] = {}
+        # History indices where each user message starts an exchange
+        self._exchange_starts: list[int] = []
+        # History slice holding the context pair seeded by the latest upload
+        self._context_span: tuple[int, int] | None = None
+        self._dive_numbers: list[str] = []
 
     @property
     def client(self):
@@ -34,47 +75,76 @@ class DiverRoastAgent:
         can identify patterns, flag dangerous dives, and roast the diver without
         needing to call heavy analysis tools on the full raw data.
         """
+        df = df.astype({c: "category" for c in _LABEL_COLUMNS if c in df.columns})
         self.dive_data = df
+        # Single-dive tools only need that dive's samples, so split the log
+        # once instead of filtering it on every call.
+        self._per_dive_data = {
+            str(dn): group
+            for dn, group in df.groupby("dive_number", sort=False, observed=True)
+        }
+        self._build_tool_fast_paths()
         dive_numbers = sorted(df["dive_number"].unique().tolist())
+        self._dive_numbers = dive_numbers
 
         # Pre-compute per-dive features
         features_df = extract_features(df)
         self.features = features_df
 
-        # Build compact per-dive summary lines
-        dive_lines = []
-        for _, row in features_df.iterrows():
-            dn = row["dive_number"]
-            site = str(row.get("dive_site_name", "N/A"))
-            trip = str(row.get("trip_name", ""))
-            location = site if site and site != "N/A" else "unknown"
-            if trip and trip != "N/A" and trip != site:
-                location += f" ({trip})"
-
-            line = (
-                f"  #{dn} {location}: "
-                f"depth {row['max_depth']:.1f}m, "
-                f"ascent {row['max_ascend_speed']:.1f}m/min, "
-                f"NDL {row['min_ndl']:.0f}min, "
-                f"SAC {row['sac_rate']:.1f}L/min, "
-                f"temp {row['avg_temp']:.1f}°C"
-            )
-            if row.get("adverse_conditions"):
-                line += " [ADVERSE]"
-            dive_lines.append(line)
+        # Build compact per-dive summary lines, one vectorized column at a time
+        site = features_df.get(
+            "dive_site_name", pd.Series("N/A", index=features_df.index)
+        ).astype(str)
+        trip = features_df.get(
+            "trip_name", pd.Series("", index=features_df.index)
+        ).astype(str)
+        location = site.where((site != "") & (site != "N/A"), "unknown")
+        show_trip = (trip != "") & (trip != "N/A") & (trip != site)
+        location = location + np.where(show_trip, " (" + trip + ")", "")
+        adverse = np.where(
+            features_df["adverse_conditions"].astype(bool), " [ADVERSE]", ""
+        )
+        lines = (
+            "  #"
+            + features_df["dive_number"].astype(str)
+            + " "
+            + location
+            + ": depth "
+            + features_df["max_depth"].map("{:.1f}".format)
+            + "m, ascent "
+            + features_df["max_ascend_speed"].map("{:.1f}".format)
+            + "m/min, NDL "
+            + features_df["min_ndl"].map("{:.0f}".format)
+            + "min, SAC "
+            + features_df["sac_rate"].map("{:.1f}".format)
+            + "L/min, temp "
+            + features_df["avg_temp"].map("{:.1f}".format)
+            + "°C"
+            + adverse
+        )
+        dive_lines = lines.tolist()
 
-        # Compute aggregate stats
+        # Compute aggregate stats in a single pass over the feature columns
         n = len(features_df)
+        stats = features_df.agg(
+            {
+                "max_depth": ["mean", "max"],
+                "sac_rate": ["mean", "max"],
+                "max_ascend_speed": ["mean", "max"],
+                "min_ndl": ["min"],
+                "adverse_conditions": ["sum"],
+            }
+        )
         agg = (
             f"Aggregates ({n} dives): "
-            f"avg max depth {features_df['max_depth'].mean():.1f}m, "
-            f"deepest {features_df['max_depth'].max():.1f}m, "
-            f"avg SAC {features_df['sac_rate'].mean():.1f} L/min, "
-            f"worst SAC {features_df['sac_rate'].max():.1f} L/min, "
-            f"avg max ascent {features_df['max_ascend_speed'].mean():.1f} m/min, "
-            f"fastest ascent {features_df['max_ascend_speed'].max():.1f} m/min, "
-            f"lowest NDL {features_df['min_ndl'].min():.0f} min, "
-            f"{int(features_df['adverse_conditions'].sum())} adverse-condition dives"
+            f"avg max depth {stats.at['mean', 'max_depth']:.1f}m, "
+            f"deepest {stats.at['max', 'max_depth']:.1f}m, "
+            f"avg SAC {stats.at['mean', 'sac_rate']:.1f} L/min, "
+            f"worst SAC {stats.at['max', 'sac_rate']:.1f} L/min, "
+            f"avg max ascent {stats.at['mean', 'max_ascend_speed']:.1f} m/min, "
+            f"fastest ascent {stats.at['max', 'max_ascend_speed']:.1f} m/min, "
+            f"lowest NDL {stats.at['min', 'min_ndl']:.0f} min, "
+            f"{stats.at['sum', 'adverse_conditions']:.0f} adverse-condition dives"
         )
 
         # Cap at 200 dives in context to avoid token bloat
@@ -91,6 +161,7 @@ class DiverRoastAgent:
             f"When referencing dives, always use the site name, not just the number.\n\n"
             f"{agg}\n\nPer-dive summaries:\n{dive_summary}]"
         )
+        context_start = len(self.history)
         self.history.append(
             types.Content(
                 role="user",
@@ -107,18 +178,56 @@ class DiverRoastAgent:
                 ],
             )
         )
+        self._context_span = (context_start, len(self.history))
+
+    def _build_tool_fast_paths(self):
+        """Pre-render list_dives and get_dive_summary answers for every dive.
+
+        Both tools only need a handful of per-dive aggregates, so they can be
+        answered without rescanning the raw samples on every call.
+        """
+        self._dive_list = None
+        self._dive_summaries = {}
+        df = self.dive_data
+        required = {"dive_site_name", "trip_name", "depth", "time", "sac_rate"}
+        if df is None or df.empty or not required <= set(df.columns):
+            return
+
+        aggs = {
+            "site": ("dive_site_name", "first"),
+            "trip": ("trip_name", "first"),
+            "max_depth": ("depth", "max"),
+            "duration": ("time", "max"),
+            "sac_rate": ("sac_rate", "first"),
+        }
+        if "rating" in df.columns:
+            aggs["rating"] = ("rating", "first")
+        per_dive = (
+            df.groupby("dive_number", sort=False, observed=True)
+            .agg(**aggs)
+            # Numeric dive order, as list_dives produces
+            .sort_index(
+                key=lambda idx: pd.Index(pd.to_numeric(idx.to_numpy(), errors="coerce"))
+            )
+        )
+        lines = []
+        for dn, row in zip(per_dive.index, per_dive.itertuples(), strict=True):
+            rating = getattr(row, "rating", "N/A")
+            lines.append(
+                f"  #{dn}: {row.site} — {row.max_depth:.1f}m max — rating {rating}/5"
+            )
+            self._dive_summaries[str(dn)] = (
+                f"  Location: {row.site} ({row.trip})\n"
+                f"  Max Depth: {row.max_depth:.1f}m\n"
+                f"  Duration: {row.duration:.0f} seconds\n"
+                f"  SAC Rate: {row.sac_rate}\n"
+                f"  Rating: {rating}/5"
+            )
+        self._dive_list = f"Loaded dives ({len(lines)}):\n" + "\n".join(lines)
 
     def get_dive_numbers(self) -> list[str]:
         """Return list of available dive numbers."""
-        if self.dive_data is None:
-            return []
-        return sorted(self.dive_data["dive_number"].unique().tolist())
-
-    def _get_dive_data_json(self) -> str:
-        """Serialize dive data to JSON for tool calls."""
-        if self.dive_data is None:
-            return "[]"
-        return self.dive_data.to_json()
+        return list(self._dive_numbers)
 
     def _execute_tool(self, function_call: types.FunctionCall) -> str:
         """Execute a tool function call and return the result."""
@@ -130,14 +239,27 @@ class DiverRoastAgent:
             func_name: str = function_call.name or ""
             args = dict(function_call.args) if function_call.args else {}
 
-            # Inject dive_data_json for tools that need it
-            if func_name in (
-                "analyze_dive_profile",
-                "get_dive_summary",
-                "list_dives",
-                "analyze_all_dives",
-            ):
-                args["dive_data_json"] = self._get_dive_data_json()
+            # Answer from pre-rendered aggregates when possible
+            if func_name == "list_dives" and self._dive_list is not None:
+                return self._dive_list
+            if func_name == "get_dive_summary":
+                summary = self._dive_summaries.get(
+                    dive_key(self._dive_summaries, args.get("dive_number"))
+                )
+                if summary is not None:
+                    return f"Dive {args['dive_number']}:\n{summary}"
+
+            # Hand the session's DataFrame to tools that need it. Single-dive
+            # tools get just that dive's samples; unknown numbers fall back to
+            # the full log so the tool can report the miss itself.
+            dive_data = self.dive_data if self.dive_data is not None else pd.DataFrame()
+            if func_name in _SINGLE_DIVE_TOOLS:
+                dive_df = self._per_dive_data.get(
+                    dive_key(self._per_dive_data, args.get("dive_number"))
+                )
+                args["dive_data"] = dive_df if dive_df is not None else dive_data
+            elif func_name in _FULL_LOG_TOOLS:
+                args["dive_data"] = dive_data
 
             func = TOOL_FUNCTIONS.get(func_name)
             if func is None:
@@ -148,6 +270,50 @@ class DiverRoastAgent:
             except Exception as e:
                 return f"Tool error ({func_name}): {e!s}"
 
+    @contextlib.contextmanager
+    def _history_transaction(self) -> Iterator[None]:
+        """Roll history back to its current length if the block raises.
+
+        Keeps the agent state clean for the next user message when a turn
+        fails part-way through tool calling.
+        """
+        snapshot = len(self.history)
+        try:
+            yield
+        except Exception:
+            del self.history[snapshot:]
+            while self._exchange_starts and self._exchange_starts[-1] >= snapshot:
+                self._exchange_starts.pop()
+            raise
+
+    def _append_user_message(self, text: str) -> None:
+        self._exchange_starts.append(len(self.history))
+        self.history.append(
+            types.Content(role="user", parts=[types.Part.from_text(text=text)])
+        )
+
+    def _request_contents(self) -> list[types.Content]:
+        """History to send to Gemini for the next call.
+
+        Long conversations keep the seeded dive context plus the last
+        ``CHAT_HISTORY_MAX_EXCHANGES`` exchanges, so per-turn request size
+        stays bounded.  Cuts only fall on user messages, which keeps every
+        function call next to its response.  The context is the one seeded
+        by the most recent upload, or whatever precedes the first exchange.
+        """
+        limit = settings.CHAT_HISTORY_MAX_EXCHANGES
+        if len(self._exchange_starts) <= limit:
+            return self.history
+        window_start = self._exchange_starts[-limit]
+        if self._context_span is None:
+            context_start, context_end = 0, self._exchange_starts[0]
+        else:
+            context_start, context_end = self._context_span
+        if context_start >= window_start:
+            # The latest context is already inside the kept window
+            return self.history[window_start:]
+        return self.history[context_start:context_end] + self.history[window_start:]
+
     def _extract_function_calls(
         self, response: types.GenerateContentResponse
     ) -> list[types.FunctionCall]:
@@ -163,45 +329,49 @@ class DiverRoastAgent:
             if p.function_call is not None
         ]
 
+    async def _run_tools(
+        self, function_calls: list[types.FunctionCall]
+    ) -> list[types.Part]:
+        """Execute one round of tool calls concurrently, preserving order.
+
+        Each call runs in a worker thread; ``asyncio.to_thread`` copies the
+        current context so the tool spans stay parented to the chat span.
+        """
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self._execute_tool, fc) for fc in function_calls)
+        )
+        return [
+            types.Part.from_function_response(
+                name=fc.name or "",
+                response={"result": result},
+            )
+            for fc, result in zip(function_calls, results, strict=True)
+        ]
+
     async def chat(self, user_message: str) -> AsyncGenerator[str, None]:
         """Process a user message and yield streaming response chunks.
 
         Handles the Gemini function-calling loop: call -> tool -> call -> final text.
+        History is rolled back if the turn fails part-way through.
         """
         tracer = get_tracer()
         prompt_ver = get_active_prompt()
-        span_attrs = {
-            "openinference.span.kind": "CHAIN",
-            "prompt.version": prompt_ver.version,
-            "prompt.label": prompt_ver.label,
-        }
-        if prompt_ver.phoenix_version_id:
-            span_attrs["prompt.phoenix_version_id"] = prompt_ver.phoenix_version_id
+        config = _generation_config(prompt_ver)
         with (
             tracer.start_as_current_span(
                 "agent.chat",
-                attributes=span_attrs,
+                attributes=_prompt_span_attributes(prompt_ver),
             ),
             using_attributes(session_id=str(id(self))),
+            self._history_transaction(),
         ):
-            self.history.append(
-                types.Content(
-                    role="user",
-                    parts=[types.Part.from_text(text=user_message)],
-                )
-            )
-
-            tools = [types.Tool(function_declarations=TOOL_DECLARATIONS)]
+            self._append_user_message(user_message)
 
             while True:
-                response = self.client.models.generate_content(
+                response = await self.client.aio.models.generate_content(
                     model=settings.GEMINI_MODEL,
-                    contents=self.history,
-                    config=types.GenerateContentConfig(
-                        system_instruction=prompt_ver.prompt,
-                        tools=tools,
-                        temperature=0.8,
-                    ),
+                    contents=self._request_contents(),
+                    config=config,
                 )
 
                 function_calls = self._extract_function_calls(response)
@@ -211,15 +381,7 @@ class DiverRoastAgent:
                     self.history.append(response.candidates[0].content)  # type: ignore[arg-type]
 
                     # Execute all tool calls and build response parts
-                    tool_response_parts = []
-                    for fc in function_calls:
-                        result = self._execute_tool(fc)
-                        tool_response_parts.append(
-                            types.Part.from_function_response(
-                                name=fc.name or "",
-                                response={"result": result},
-                            )
-                        )
+                    tool_response_parts = await self._run_tools(function_calls)
 
                     # Add tool results to history
                     self.history.append(
@@ -242,89 +404,65 @@ class DiverRoastAgent:
     async def chat_stream(self, user_message: str) -> AsyncGenerator[str, None]:
         """Stream response token-by-token using Gemini's streaming API.
 
-        Falls back to non-streaming for tool-calling rounds, then streams
-        the final text response.  If an error occurs mid-way through tool
-        calling, the conversation history is rolled back so subsequent
-        messages don't see a broken state.
+        Every round is streamed; text is yielded as chunks arrive and any
+        function calls are collected and executed once the round ends.  If
+        an error occurs mid-way through tool calling, the conversation
+        history is rolled back so subsequent messages don't see a broken
+        state.
         """
         tracer = get_tracer()
         prompt_ver = get_active_prompt()
-        stream_span_attrs = {
-            "openinference.span.kind": "CHAIN",
-            "prompt.version": prompt_ver.version,
-            "prompt.label": prompt_ver.label,
-        }
-        if prompt_ver.phoenix_version_id:
-            stream_span_attrs["prompt.phoenix_version_id"] = (
-                prompt_ver.phoenix_version_id
-            )
+        config = _generation_config(prompt_ver)
         with (
             tracer.start_as_current_span(
                 "agent.chat_stream",
-                attributes=stream_span_attrs,
+                attributes=_prompt_span_attributes(prompt_ver),
             ),
             using_attributes(session_id=str(id(self))),
+            self._history_transaction(),
         ):
-            # Snapshot history length so we can roll back on failure
-            history_snapshot = len(self.history)
+            self._append_user_message(user_message)
 
-            self.history.append(
-                types.Content(
-                    role="user",
-                    parts=[types.Part.from_text(text=user_message)],
+            while True:
+                stream = await self.client.aio.models.generate_content_stream(
+                    model=settings.GEMINI_MODEL,
+                    contents=self._request_contents(),
+                    config=config,
                 )
-            )
-
-            tools = [types.Tool(function_declarations=TOOL_DECLARATIONS)]
 
-            try:
-                while True:
-                    response = self.client.models.generate_content(
-                        model=settings.GEMINI_MODEL,
-                        contents=self.history,
-                        config=types.GenerateContentConfig(
-                            system_instruction=prompt_ver.prompt,
-                            tools=tools,
-                            temperature=0.8,
-                        ),
-                    )
-
-                    function_calls = self._extract_function_calls(response)
+                # Forward text as it arrives while collecting every part,
+                # since a function call can show up in any chunk.
+                parts: list[types.Part] = []
+                function_calls: list[types.FunctionCall] = []
+                text_chunks: list[str] = []
+                async for chunk in stream:
+                    if not chunk.candidates or not chunk.candidates[0].content:
+                        continue
+                    for part in chunk.candidates[0].content.parts or []:
+                        parts.append(part)
+                        if part.function_call:
+                            function_calls.append(part.function_call)
+                        elif part.text and not part.thought:
+                            text_chunks.append(part.text)
+                            if not function_calls:
+                                yield part.text
 
-                    if function_calls:
-                        self.history.append(response.candidates[0].content)  # type: ignore[arg-type]
+                if function_calls:
+                    self.history.append(types.Content(role="model", parts=parts))
 
-                        tool_response_parts = []
-                        for fc in function_calls:
-                            result = self._execute_tool(fc)
-                            tool_response_parts.append(
-                                types.Part.from_function_response(
-                                    name=fc.name or "",
-                                    response={"result": result},
-                                )
-                            )
+                    tool_response_parts = await self._run_tools(function_calls)
 
-                        self.history.append(
-                            types.Content(role="user", parts=tool_response_parts)
-                        )
-                        continue
+                    self.history.append(
+                        types.Content(role="user", parts=tool_response_parts)
+                    )
+                    continue
 
-                    # No tool calls — yield the final text response
-                    if response.text:
-                        self.history.append(
-                            types.Content(
-                                role="model",
-                                parts=[types.Part.from_text(text=response.text)],
-                            )
+                # No tool calls — store the streamed text as one turn
+                if text_chunks:
+                    self.history.append(
+                        types.Content(
+                            role="model",
+                            parts=[types.Part.from_text(text="".join(text_chunks))],
                         )
-                        # Yield in chunks for SSE streaming
-                        text = response.text
-                        chunk_size = 20
-                        for i in range(0, len(text), chunk_size):
-                            yield text[i : i + chunk_size]
-                    break
-            except Exception:
-                # Roll back history to before this message so the agent
-                # state stays clean for the next user message
-                self.history = self.history[:history_snapshot]
-                raise
+                    )
+                break
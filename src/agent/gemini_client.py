@@ -1,8 +1,15 @@
+import functools
+
 from google import genai
 
 from src.config import settings
 
 
+@functools.lru_cache(maxsize=1)
 def get_client() -> genai.Client:
-    """Return a configured Google GenAI client."""
+    """Return a configured Google GenAI client.
+
+    The client is shared process-wide so every session and dashboard request
+    reuses the same HTTP connection pool.
+    """
     return genai.Client(api_key=settings.GEMINI_API_KEY)
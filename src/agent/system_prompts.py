@@ -1,5 +1,8 @@
 import logging
+import threading
+import time
 from dataclasses import dataclass, field
+from types import MappingProxyType
 
 from src.config import settings
 
@@ -85,7 +88,7 @@ PHOENIX_PROMPT_NAME = "diveroast-system"
 PHOENIX_PROMPT_TAG = "production"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PromptVersion:
     version: int
     label: str
@@ -94,48 +97,64 @@ class PromptVersion:
     phoenix_version_id: str | None = field(default=None)
 
 
-PROMPT_VERSIONS: dict[int, PromptVersion] = {
-    1: PromptVersion(1, "roast-master", "Initial aggressive roaster", PROMPT_V1),
-    2: PromptVersion(2, "polite-analyst", "Too polite, forgettable", PROMPT_V2),
-    3: PromptVersion(
-        3,
-        "dry-humor-analyst",
-        "Seasoned analyst with dry humor — production version",
-        PROMPT_V3,
-    ),
-}
+PROMPT_VERSIONS: MappingProxyType[int, PromptVersion] = MappingProxyType(
+    {
+        1: PromptVersion(1, "roast-master", "Initial aggressive roaster", PROMPT_V1),
+        2: PromptVersion(2, "polite-analyst", "Too polite, forgettable", PROMPT_V2),
+        3: PromptVersion(
+            3,
+            "dry-humor-analyst",
+            "Seasoned analyst with dry humor — production version",
+            PROMPT_V3,
+        ),
+    }
+)
+
+
+_phoenix_cache: dict[tuple[str, str], tuple[float, PromptVersion | None]] = {}
+_phoenix_cache_lock = threading.Lock()
 
 
 def get_prompt_from_phoenix() -> PromptVersion | None:
     """Fetch the production-tagged prompt from Phoenix.
 
     Returns None if Phoenix is unavailable or the prompt doesn't exist.
+    Results, misses included, are cached per prompt name and tag for
+    ``PROMPT_CACHE_TTL_SECONDS``.
     """
+    key = (PHOENIX_PROMPT_NAME, PHOENIX_PROMPT_TAG)
+    with _phoenix_cache_lock:
+        cached = _phoenix_cache.get(key)
+        if cached is not None and time.monotonic() < cached[0]:
+            return cached[1]
+
+        prompt = _fetch_prompt_from_phoenix(*key)
+        _phoenix_cache[key] = (
+            time.monotonic() + settings.PROMPT_CACHE_TTL_SECONDS,
+            prompt,
+        )
+        return prompt
+
+
+def _fetch_prompt_from_phoenix(name: str, tag: str) -> PromptVersion | None:
     try:
         from phoenix.client import Client
 
         client = Client(base_url=settings.PHOENIX_CLIENT_ENDPOINT)
-        prompt = client.prompts.get(
-            prompt_identifier=PHOENIX_PROMPT_NAME,
-            tag=PHOENIX_PROMPT_TAG,
-        )
+        prompt = client.prompts.get(prompt_identifier=name, tag=tag)
         # Extract system message text via the public format() API
         formatted = prompt.format()
-        messages = formatted.messages
-        system_text = ""
-        for msg in messages:
-            if msg.get("role") == "system":
-                content = msg.get("content", "")
-                if isinstance(content, str):
-                    system_text = content
-                elif isinstance(content, list):
-                    # Handle structured content blocks
-                    system_text = "".join(
-                        block.get("text", "")
-                        for block in content
-                        if isinstance(block, dict)
-                    )
-                break
+        system_msg = next(
+            (msg for msg in formatted.messages if msg.get("role") == "system"), None
+        )
+        content = system_msg.get("content", "") if system_msg is not None else ""
+        if isinstance(content, list):
+            # Handle structured content blocks
+            system_text = "".join(
+                block.get("text", "") for block in content if isinstance(block, dict)
+            )
+        else:
+            system_text = content if isinstance(content, str) else ""
 
         if not system_text:
             logger.warning(
@@ -145,7 +164,7 @@ def get_prompt_from_phoenix() -> PromptVersion | None:
 
         return PromptVersion(
             version=0,
-            label=f"phoenix-{PHOENIX_PROMPT_TAG}",
+            label=f"phoenix-{tag}",
             changelog="Fetched from Phoenix",
             prompt=system_text,
             phoenix_version_id=str(prompt.id),
@@ -174,5 +193,17 @@ def get_active_prompt() -> PromptVersion:
     return _get_local_prompt()
 
 
-# Backward-compatible alias
-ROAST_SYSTEM_PROMPT = _get_local_prompt().prompt
+def invalidate_active_prompt() -> None:
+    """Drop cached Phoenix prompts so the next lookup refetches them."""
+    with _phoenix_cache_lock:
+        _phoenix_cache.clear()
+
+
+def __getattr__(name: str) -> str:
+    # Backward-compatible ROAST_SYSTEM_PROMPT alias, resolved on first access
+    # and then stored as a real module global.
+    if name == "ROAST_SYSTEM_PROMPT":
+        value = _get_local_prompt().prompt
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
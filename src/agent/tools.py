@@ -1,6 +1,7 @@
 import contextlib
-import io
+from collections.abc import Container
 
+import orjson
 import pandas as pd
 from google.genai import types
 
@@ -33,24 +34,78 @@ def search_dan_guidelines(query: str) -> str:
         return retrieve_context(prefixed_query)
 
 
+def _json_to_df(dive_data_json: str) -> pd.DataFrame:
+    """Parse column-oriented dive JSON into a DataFrame."""
+    df = pd.DataFrame(orjson.loads(dive_data_json))
+    # Numeric dive numbers come back as ints, as pd.read_json infers them
+    if "dive_number" in df.columns:
+        with contextlib.suppress(ValueError, TypeError):
+            df["dive_number"] = pd.to_numeric(df["dive_number"])
+    return df
+
+
+def _as_dataframe(dive_data: pd.DataFrame | str) -> pd.DataFrame:
+    """Accept dive samples as a DataFrame or as column-oriented JSON."""
+    if isinstance(dive_data, pd.DataFrame):
+        return dive_data
+    return _json_to_df(dive_data)
+
+
+def _sorted_dive_numbers(dive_numbers: pd.Series) -> list:
+    """Unique dive numbers, in numeric order when they all parse as numbers."""
+    unique = dive_numbers.unique().tolist()
+    try:
+        return sorted(unique, key=float)
+    except (ValueError, TypeError):
+        return sorted(unique)
+
+
+def dive_key(known: Container[str], dive_number: object) -> str:
+    """Normalize a requested dive number to the string form used in ``known``.
+
+    Integer dive numbers may be passed with padding, e.g. "07" for dive 7.
+    """
+    key = str(dive_number)
+    if key not in known and key.isdigit():
+        key = str(int(key))
+    return key
+
+
 def _filter_dive(df: pd.DataFrame, dive_number: str) -> pd.DataFrame:
     """Filter a DataFrame to rows matching dive_number, handling type coercion."""
-    # dive_number column may be int or str depending on JSON round-trip
-    result = df[df["dive_number"] == dive_number]
-    if result.empty:
-        with contextlib.suppress(ValueError, TypeError):
-            result = df[df["dive_number"] == int(dive_number)]
+    # dive_number column may be int or str depending on JSON round-trip, so
+    # convert the key to the column's type instead of trying both
+    column = df["dive_number"]
+    dtype = column.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    key = str(dive_number)
+    if pd.api.types.is_integer_dtype(dtype):
+        try:
+            return df[column == int(key)]
+        except ValueError:
+            return df.iloc[:0]
+    result = df[column == key]
+    if result.empty and key.isdigit() and key != str(int(key)):
+        # Padded request such as "07" for a string-typed dive 7
+        result = df[column == str(int(key))]
     return result
 
 
-def analyze_dive_profile(dive_number: str, dive_data_json: str) -> str:
-    """Analyze a specific dive's profile and flag safety issues."""
+def analyze_dive_profile(
+    dive_number: str, dive_data: pd.DataFrame | str, verbose: bool = False
+) -> str:
+    """Analyze a specific dive's profile and flag safety issues.
+
+    Only a one-line summary accompanies the issues unless verbose is set,
+    which keeps the tool response (and the next LLM turn) small.
+    """
     tracer = get_tracer()
     with tracer.start_as_current_span(
         "tool.analyze_dive_profile",
         attributes={"openinference.span.kind": "TOOL"},
     ):
-        df = pd.read_json(io.StringIO(dive_data_json))
+        df = _as_dataframe(dive_data)
         dive_df = _filter_dive(df, dive_number)
 
         if dive_df.empty:
@@ -65,51 +120,57 @@ def analyze_dive_profile(dive_number: str, dive_data_json: str) -> str:
 
         if row.get("max_ascend_speed", 0) > 10:
             issues.append(
-                f"HIGH ASCENT RATE: Max ascent speed was {row['max_ascend_speed']:.1f} m/min "
+                f"- HIGH ASCENT RATE: Max ascent speed was {row['max_ascend_speed']:.1f} m/min "
                 f"(recommended: <10 m/min). {int(row.get('high_ascend_speed_count', 0))} "
                 f"instances of excessive speed detected."
             )
         if row.get("min_ndl", float("inf")) < 5:
             issues.append(
-                f"DANGEROUSLY LOW NDL: Minimum NDL dropped to {row['min_ndl']:.0f} minutes. "
+                f"- DANGEROUSLY LOW NDL: Minimum NDL dropped to {row['min_ndl']:.0f} minutes. "
                 f"This is cutting it extremely close to mandatory decompression."
             )
         if row.get("sac_rate", 0) > 20:
             issues.append(
-                f"HIGH AIR CONSUMPTION: SAC rate of {row['sac_rate']:.1f} l/min is above average. "
+                f"- HIGH AIR CONSUMPTION: SAC rate of {row['sac_rate']:.1f} l/min is above average. "
                 f"Consider working on breathing technique and buoyancy."
             )
         if row.get("max_depth", 0) > 30:
             issues.append(
-                f"DEEP DIVE: Maximum depth of {row['max_depth']:.1f}m. "
+                f"- DEEP DIVE: Maximum depth of {row['max_depth']:.1f}m. "
                 f"Ensure you have appropriate training and gas planning for this depth."
             )
         if row.get("adverse_conditions", 0) == 1:
             issues.append(
-                "This dive was flagged as having ADVERSE CONDITIONS (rating < 3)."
+                "- This dive was flagged as having ADVERSE CONDITIONS (rating < 3)."
             )
 
-        summary = create_text_report(row.to_dict())
-        if issues:
-            return (
-                f"Dive {dive_number} Analysis:\n{summary}\n\nIssues Found:\n"
-                + "\n".join(f"- {issue}" for issue in issues)
-            )
+        if verbose:
+            summary = create_text_report(row.to_dict())
         else:
+            summary = (
+                f"{row.get('dive_site_name', 'N/A')}, "
+                f"max depth {row.get('max_depth', 0):.1f}m, "
+                f"SAC rate {row.get('sac_rate', 0):.1f}"
+            )
+        if not issues:
             return f"Dive {dive_number} Analysis:\n{summary}\n\nNo major safety issues detected. Dive looks clean."
+        return (
+            f"Dive {dive_number} Analysis:\n{summary}\n\nIssues Found:\n"
+            + "\n".join(issues)
+        )
 
 
-def list_dives(dive_data_json: str) -> str:
+def list_dives(dive_data: pd.DataFrame | str) -> str:
     """List all dives in the loaded dive log with basic info."""
     tracer = get_tracer()
     with tracer.start_as_current_span(
         "tool.list_dives",
         attributes={"openinference.span.kind": "TOOL"},
     ):
-        df = pd.read_json(io.StringIO(dive_data_json))
+        df = _as_dataframe(dive_data)
         if df.empty:
             return "No dive data loaded."
-        dive_nums = sorted(df["dive_number"].unique().tolist())
+        dive_nums = _sorted_dive_numbers(df["dive_number"])
         lines = []
         for dn in dive_nums:
             dive_df = _filter_dive(df, str(dn))
@@ -121,14 +182,14 @@ def list_dives(dive_data_json: str) -> str:
         return f"Loaded dives ({len(dive_nums)}):\n" + "\n".join(lines)
 
 
-def analyze_all_dives(dive_data_json: str) -> str:
+def analyze_all_dives(dive_data: pd.DataFrame | str) -> str:
     """Analyze all dives together: aggregate stats, safety concerns, worst offenders."""
     tracer = get_tracer()
     with tracer.start_as_current_span(
         "tool.analyze_all_dives",
         attributes={"openinference.span.kind": "TOOL"},
     ):
-        df = pd.read_json(io.StringIO(dive_data_json))
+        df = _as_dataframe(dive_data)
         if df.empty:
             return "No dive data loaded."
 
@@ -207,14 +268,14 @@ def analyze_all_dives(dive_data_json: str) -> str:
         return "\n".join(sections)
 
 
-def get_dive_summary(dive_number: str, dive_data_json: str) -> str:
+def get_dive_summary(dive_number: str, dive_data: pd.DataFrame | str) -> str:
     """Get a summary of a specific dive including location, depth, duration, and rating."""
     tracer = get_tracer()
     with tracer.start_as_current_span(
         "tool.get_dive_summary",
         attributes={"openinference.span.kind": "TOOL"},
     ):
-        df = pd.read_json(io.StringIO(dive_data_json))
+        df = _as_dataframe(dive_data)
         dive_df = _filter_dive(df, dive_number)
 
         if dive_df.empty:
@@ -279,6 +340,10 @@ TOOL_DECLARATIONS = [
                     type=types.Type.STRING,
                     description="The dive number to analyze",
                 ),
+                "verbose": types.Schema(
+                    type=types.Type.BOOLEAN,
+                    description="Include the full depth, ascent and NDL report instead of a one-line summary",
+                ),
             },
             required=["dive_number"],
         ),
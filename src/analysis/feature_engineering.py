@@ -2,6 +2,42 @@ import numpy as np
 import pandas as pd
 
 
+def _ascent_speed_kernel(
+    codes: np.ndarray,
+    time: np.ndarray,
+    depth: np.ndarray,
+    shallow_threshold: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Per-dive max ascent speed and count of samples above 10 m/min.
+
+    ``codes`` must be sorted so each dive is one contiguous run, with
+    samples in their original order inside it.  Returns one value per run.
+    """
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+
+    time_diff = np.diff(time, prepend=np.nan)
+    depth_diff = np.diff(depth, prepend=np.nan)
+    # No diff across dive boundaries; missing diffs count as no change.
+    time_diff[starts] = 0
+    depth_diff[starts] = 0
+    time_diff[np.isnan(time_diff)] = 0
+    depth_diff[np.isnan(depth_diff)] = 0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Convert to m/min; positive depth diff means we are gaining depth.
+        speed = (depth_diff / time_diff) * 60 * -1
+    speed[~np.isfinite(speed)] = 0
+
+    # Zero out ascent speed for near-surface samples where sensor noise
+    # causes unrealistically high readings.
+    prev_depth = depth - depth_diff
+    speed[(depth < shallow_threshold) | (prev_depth < shallow_threshold)] = 0
+
+    max_speed = np.maximum.reduceat(speed, starts)
+    high_count = np.add.reduceat((speed > 10).astype(np.int64), starts)
+    return max_speed, high_count
+
+
 def calculate_ascend_speed(data, shallow_threshold=2.0):
     """Calculate max ascend speed and count of high-speed ascent instances per dive.
 
@@ -10,50 +46,37 @@ def calculate_ascend_speed(data, shallow_threshold=2.0):
     and produce unrealistically high ascent rates (e.g. 80 m/min from a 1 m
     depth change in 1 second on surfacing).
     """
-    data["time_diff"] = data.groupby("dive_number")["time"].diff().fillna(0)
-    data["depth_diff"] = data.groupby("dive_number")["depth"].diff().fillna(0)
-    data["ascend_speed"] = (
-        data["depth_diff"] / data["time_diff"]
-    ) * 60  # Convert to meters per minute
-    data["ascend_speed"] = (
-        data["ascend_speed"] * -1
-    )  # Because positive depth diff means we are gaining depth
-    data["ascend_speed"] = (
-        data["ascend_speed"].replace([np.inf, -np.inf], np.nan).fillna(0)
-    )  # Handle infinite and NaN values
-
-    # Zero out ascent speed for near-surface samples where sensor noise
-    # causes unrealistically high readings.
-    prev_depth = data["depth"] - data["depth_diff"]
-    shallow_mask = (data["depth"] < shallow_threshold) | (
-        prev_depth < shallow_threshold
-    )
-    data.loc[shallow_mask, "ascend_speed"] = 0
-
-    # Calculate the maximum ascend speed per dive
-    max_ascend_speed = data.groupby("dive_number")["ascend_speed"].max().reset_index()
-    max_ascend_speed.rename(columns={"ascend_speed": "max_ascend_speed"}, inplace=True)
-
-    # Calculate the count of high ascend speed instances per dive
-    high_ascend_speed_count = (
-        data[data["ascend_speed"] > 10]
-        .groupby("dive_number")["ascend_speed"]
-        .count()
-        .reset_index()
-    )
-    high_ascend_speed_count.rename(
-        columns={"ascend_speed": "high_ascend_speed_count"}, inplace=True
+    codes, dive_numbers = data["dive_number"].factorize(sort=True)
+    max_speed, high_count = _ascent_speed_by_code(codes, data, shallow_threshold)
+    return pd.DataFrame(
+        {
+            "dive_number": dive_numbers,
+            "max_ascend_speed": max_speed,
+            "high_ascend_speed_count": high_count,
+        }
     )
 
-    # Merge the two results
-    ascend_speed_features = pd.merge(
-        max_ascend_speed, high_ascend_speed_count, on="dive_number", how="left"
-    )
-    ascend_speed_features["high_ascend_speed_count"] = ascend_speed_features[
-        "high_ascend_speed_count"
-    ].fillna(0)
 
-    return ascend_speed_features
+def _ascent_speed_by_code(
+    codes: np.ndarray, data: pd.DataFrame, shallow_threshold: float = 2.0
+) -> tuple[np.ndarray, np.ndarray]:
+    """Run the ascent kernel over samples labelled with dense dive codes.
+
+    ``codes`` holds one group code per row (``-1`` for rows without a dive
+    number); results are indexed by code.
+    """
+    # Stable sort groups each dive's samples while keeping their order;
+    # samples without a dive number are dropped, as groupby would.
+    order = np.argsort(codes, kind="stable")
+    order = order[codes[order] >= 0]
+    if len(order) == 0:
+        return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64)
+    return _ascent_speed_kernel(
+        codes[order],
+        data["time"].to_numpy(dtype=np.float64)[order],
+        data["depth"].to_numpy(dtype=np.float64)[order],
+        shallow_threshold,
+    )
 
 
 def label_adverse_conditions(features_df):
@@ -68,80 +91,74 @@ def extract_features(df: pd.DataFrame) -> pd.DataFrame:
     Takes a DataFrame with per-sample dive data (as returned by parsers)
     and aggregates it into per-dive features.
     """
-    data = df.copy()
-    # Calculate ascend speed features
-    ascend_speed_features = calculate_ascend_speed(data)
-
-    features = (
-        data.groupby("dive_number")
-        .agg(
-            avg_depth=("depth", "mean"),
-            max_depth=("depth", "max"),
-            depth_variability=("depth", "std"),
-            avg_temp=("temperature", "mean"),
-            max_temp=("temperature", "max"),
-            temp_variability=("temperature", "std"),
-            avg_pressure=("pressure", "mean"),
-            max_pressure=("pressure", "max"),
-            pressure_variability=("pressure", "std"),
-            min_ndl=("ndl", "min"),
-            sac_rate=("sac_rate", "first"),
-            rating=("rating", "first"),
-            **(
-                {
-                    "dive_site_name": ("dive_site_name", "first"),
-                }
-                if "dive_site_name" in data.columns
-                else {}
-            ),
-            **(
-                {
-                    "trip_name": ("trip_name", "first"),
-                }
-                if "trip_name" in data.columns
-                else {}
-            ),
-            **(
-                {
-                    "latitude": ("latitude", "first"),
-                }
-                if "latitude" in data.columns
-                else {}
-            ),
-            **(
-                {
-                    "longitude": ("longitude", "first"),
-                }
-                if "longitude" in data.columns
-                else {}
-            ),
-        )
-        .reset_index()
-    )
-
-    # Merge the ascend speed features with other features
-    features = features.merge(ascend_speed_features, on="dive_number")
-    # Fill NaN values in variability columns with the mean of each column
-    features["depth_variability"] = features["depth_variability"].fillna(
-        features["depth_variability"].mean()
-    )
-    features["temp_variability"] = features["temp_variability"].fillna(
-        features["temp_variability"].mean()
-    )
-    features["pressure_variability"] = features["pressure_variability"].fillna(
-        features["pressure_variability"].mean()
-    )
-    features["avg_pressure"] = features["avg_pressure"].fillna(
-        features["avg_pressure"].mean()
-    )
-    features["max_pressure"] = features["max_pressure"].fillna(
-        features["max_pressure"].mean()
-    )
-    features["sac_rate"] = features["sac_rate"].fillna(features["sac_rate"].mean())
+    # One grouping pass serves both the aggregations and the ascent kernel
+    grouped = df.groupby("dive_number", observed=True)
+    features = grouped.agg(
+        avg_depth=("depth", "mean"),
+        max_depth=("depth", "max"),
+        depth_variability=("depth", "std"),
+        avg_temp=("temperature", "mean"),
+        max_temp=("temperature", "max"),
+        temp_variability=("temperature", "std"),
+        avg_pressure=("pressure", "mean"),
+        max_pressure=("pressure", "max"),
+        pressure_variability=("pressure", "std"),
+        min_ndl=("ndl", "min"),
+        sac_rate=("sac_rate", "first"),
+        rating=("rating", "first"),
+        **(
+            {
+                "dive_site_name": ("dive_site_name", "first"),
+            }
+            if "dive_site_name" in df.columns
+            else {}
+        ),
+        **(
+            {
+                "trip_name": ("trip_name", "first"),
+            }
+            if "trip_name" in df.columns
+            else {}
+        ),
+        **(
+            {
+                "latitude": ("latitude", "first"),
+            }
+            if "latitude" in df.columns
+            else {}
+        ),
+        **(
+            {
+                "longitude": ("longitude", "first"),
+            }
+            if "longitude" in df.columns
+            else {}
+        ),
+    ).reset_index()
+
+    # Groups come out in sorted order, matching ngroup() codes
+    max_speed, high_count = _ascent_speed_by_code(grouped.ngroup().to_numpy(), df)
+    features["max_ascend_speed"] = max_speed
+    features["high_ascend_speed_count"] = high_count
+
+    # Fill NaN values in variability/pressure/SAC columns with the column mean
+    mean_filled = [
+        "depth_variability",
+        "temp_variability",
+        "pressure_variability",
+        "avg_pressure",
+        "max_pressure",
+        "sac_rate",
+    ]
+    features = features.fillna(features[mean_filled].mean().to_dict())
+
+    # Labels may arrive as categories; per dive they're plain values again,
+    # which also lets the fill below write 0 into them.
+    categorical = features.select_dtypes("category").columns
+    features[categorical] = features[categorical].astype(object).infer_objects()
 
     # Fill any remaining NaN values (e.g. single-dive with all-NaN pressure)
-    # with 0 before dropping rows that are entirely empty.
+    # with 0.
     features = features.fillna(0)
-    features = features.dropna()
 
     return label_adverse_conditions(features)
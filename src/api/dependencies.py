@@ -1,9 +1,85 @@
+import threading
+import time
 import uuid
+from collections import OrderedDict
 
 from src.agent.conversation import DiverRoastAgent
+from src.api.models import DashboardResponse
+from src.config import settings
 
-# In-memory session store: {session_id: DiverRoastAgent}
-_sessions: dict[str, DiverRoastAgent] = {}
+
+class SessionStore:
+    """In-memory {session_id: DiverRoastAgent} store with LRU and idle-TTL eviction.
+
+    Entries are kept in least-recently-used order, so expired sessions are
+    always at the front and eviction never has to scan the whole store.
+    Each session may also carry the dashboard built for its current upload,
+    which is dropped along with the session.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[DiverRoastAgent, float]] = OrderedDict()
+        # (version token, response) per session, cleared on upload
+        self._dashboards: dict[str, tuple[str, DashboardResponse]] = {}
+        self._lock = threading.RLock()
+
+    def get(self, session_id: str) -> DiverRoastAgent | None:
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            self._entries[session_id] = (entry[0], time.monotonic() + self.ttl)
+            self._entries.move_to_end(session_id)
+            return entry[0]
+
+    def set(self, session_id: str, agent: DiverRoastAgent) -> None:
+        with self._lock:
+            self._entries[session_id] = (agent, time.monotonic() + self.ttl)
+            self._entries.move_to_end(session_id)
+            self._dashboards.pop(session_id, None)
+            self._expire()
+            while len(self._entries) > self.maxsize:
+                self._evict(next(iter(self._entries)))
+
+    def get_dashboard(self, session_id: str) -> tuple[str, DashboardResponse] | None:
+        with self._lock:
+            return self._dashboards.get(session_id)
+
+    def set_dashboard(
+        self, session_id: str, dashboard: tuple[str, DashboardResponse]
+    ) -> None:
+        with self._lock:
+            if session_id in self._entries:
+                self._dashboards[session_id] = dashboard
+
+    def invalidate_dashboard(self, session_id: str) -> None:
+        with self._lock:
+            self._dashboards.pop(session_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire()
+            return len(self._entries)
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        while self._entries:
+            session_id, (_, expires_at) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            self._evict(session_id)
+
+    def _evict(self, session_id: str) -> None:
+        del self._entries[session_id]
+        self._dashboards.pop(session_id, None)
+
+
+_sessions = SessionStore(
+    maxsize=settings.MAX_SESSIONS, ttl=settings.SESSION_TTL_SECONDS
+)
 
 
 def get_or_create_session(session_id: str | None = None) -> tuple[str, DiverRoastAgent]:
@@ -11,15 +87,32 @@ def get_or_create_session(session_id: str | None = None) -> tuple[str, DiverRoas
 
     Returns (session_id, agent) tuple.
     """
-    if session_id and session_id in _sessions:
-        return session_id, _sessions[session_id]
+    if session_id:
+        agent = _sessions.get(session_id)
+        if agent is not None:
+            return session_id, agent
 
     new_id = session_id or str(uuid.uuid4())
     agent = DiverRoastAgent()
-    _sessions[new_id] = agent
+    _sessions.set(new_id, agent)
     return new_id, agent
 
 
 def get_session(session_id: str) -> DiverRoastAgent | None:
     """Get an existing session by ID, or None if not found."""
     return _sessions.get(session_id)
+
+
+def get_cached_dashboard(session_id: str) -> tuple[str, DashboardResponse] | None:
+    """Get the dashboard cached for a session's current upload, if any."""
+    return _sessions.get_dashboard(session_id)
+
+
+def cache_dashboard(session_id: str, dashboard: tuple[str, DashboardResponse]) -> None:
+    """Cache a (version token, response) dashboard for a live session."""
+    _sessions.set_dashboard(session_id, dashboard)
+
+
+def invalidate_dashboard(session_id: str) -> None:
+    """Drop a session's cached dashboard, e.g. after a new upload."""
+    _sessions.invalidate_dashboard(session_id)
@@ -14,11 +14,16 @@ async def lifespan(app: FastAPI):
     yield
 
 
+# Parsed once at import; blank entries (e.g. a trailing comma) are ignored
+_ALLOWED_ORIGINS = tuple(
+    origin for o in settings.ALLOWED_ORIGINS.split(",") if (origin := o.strip())
+)
+
 app = FastAPI(title="DiveRoast API", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[o.strip() for o in settings.ALLOWED_ORIGINS.split(",")],
+    allow_origins=list(_ALLOWED_ORIGINS),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -1,5 +1,4 @@
-import json
-
+import orjson
 from fastapi import APIRouter
 from sse_starlette.sse import EventSourceResponse
 
@@ -8,6 +7,8 @@ from src.api.models import ChatRequest
 
 router = APIRouter()
 
+_DONE_DATA = orjson.dumps({"status": "complete"}).decode()
+
 
 @router.post("/api/chat")
 async def chat(request: ChatRequest):
@@ -23,12 +24,13 @@ async def chat(request: ChatRequest):
     async def event_generator():
         try:
             async for chunk in agent.chat_stream(request.message):
-                yield {"event": "message", "data": json.dumps({"content": chunk})}
-            yield {"event": "done", "data": json.dumps({"status": "complete"})}
+                data = orjson.dumps({"content": chunk}).decode()
+                yield {"event": "message", "data": data}
+            yield {"event": "done", "data": _DONE_DATA}
         except Exception as e:
             yield {
                 "event": "error",
-                "data": json.dumps({"error": str(e)}),
+                "data": orjson.dumps({"error": str(e)}).decode(),
             }
 
     return EventSourceResponse(event_generator(), ping=15)
@@ -1,11 +1,20 @@
+import asyncio
 import json
 import logging
+import re
+import uuid
 
-from fastapi import APIRouter, HTTPException
+import numpy as np
+import pandas as pd
+from fastapi import APIRouter, HTTPException, Request, Response
 
 from src.agent.gemini_client import get_client
 from src.analysis.feature_engineering import extract_features
-from src.api.dependencies import get_session
+from src.api.dependencies import (
+    cache_dashboard,
+    get_cached_dashboard,
+    get_session,
+)
 from src.api.models import (
     AggregateStats,
     DashboardResponse,
@@ -29,6 +38,24 @@ THRESHOLDS = {
     "avg_temp": ("Avg Temperature", "\u00b0C", None, None),  # informational
 }
 
+# Rounding applied to each numeric DiveFeature field
+FEATURE_DECIMALS = {
+    "avg_depth": 2,
+    "max_depth": 2,
+    "depth_variability": 2,
+    "avg_temp": 2,
+    "max_temp": 2,
+    "temp_variability": 2,
+    "avg_pressure": 2,
+    "max_pressure": 2,
+    "pressure_variability": 2,
+    "min_ndl": 2,
+    "sac_rate": 2,
+    "rating": 1,
+    "max_ascend_speed": 2,
+    "high_ascend_speed_count": 0,
+}
+
 # NDL thresholds are inverted: >10 safe, 5-10 warning, <5 danger
 NDL_SAFE_LOWER = 10.0
 NDL_WARNING_LOWER = 5.0
@@ -36,23 +63,32 @@ NDL_WARNING_LOWER = 5.0
 # Temperature: cold warning <10
 TEMP_COLD_WARNING = 10.0
 
-# What makes each issue category distinctive for "pick reason"
-PICK_REASONS = {
-    "rapid ascent": "Fastest ascent rate",
-    "low NDL": "Closest to decompression limit",
-    "high air consumption": "Highest air consumption",
-    "deep dive": "Deepest dive with issues",
-    "adverse conditions": "Worst conditions",
-}
+# Issue categories, in the order they are reported and picked
+ISSUE_NAMES = (
+    "rapid ascent",
+    "low NDL",
+    "high air consumption",
+    "deep dive",
+    "adverse conditions",
+)
+
+# What makes each issue category distinctive for "pick reason" (ISSUE_NAMES order)
+PICK_REASONS = (
+    "Fastest ascent rate",
+    "Closest to decompression limit",
+    "Highest air consumption",
+    "Deepest dive with issues",
+    "Worst conditions",
+)
 
 # Which metric to rank by for each issue (and whether higher or lower is worse)
-ISSUE_RANK_KEY: dict[str, tuple[str, bool]] = {
-    "rapid ascent": ("max_ascend_speed", True),  # higher is worse
-    "low NDL": ("min_ndl", False),  # lower is worse
-    "high air consumption": ("sac_rate", True),  # higher is worse
-    "deep dive": ("max_depth", True),  # higher is worse
-    "adverse conditions": ("adverse_conditions", True),  # higher is worse
-}
+ISSUE_RANK_KEY: tuple[tuple[str, bool], ...] = (
+    ("max_ascend_speed", True),  # rapid ascent: higher is worse
+    ("min_ndl", False),  # low NDL: lower is worse
+    ("sac_rate", True),  # high air consumption: higher is worse
+    ("max_depth", True),  # deep dive: higher is worse
+    ("adverse_conditions", True),  # adverse conditions: higher is worse
+)
 
 # Region bounding boxes: (lat_min, lat_max, lon_min, lon_max)
 REGION_BOXES = {
@@ -70,6 +106,9 @@ REGION_BOXES = {
     "Hawaii": (18.0, 23.0, -162.0, -154.0),
 }
 
+_REGION_NAMES = list(REGION_BOXES)
+_REGION_BOUNDS = np.array(list(REGION_BOXES.values()))  # (regions, 4)
+
 # Keywords in site/trip names that indicate water body type
 WATER_TYPE_KEYWORDS = {
     "Quarry": ["quarry"],
@@ -78,6 +117,10 @@ WATER_TYPE_KEYWORDS = {
     "Wreck": ["wreck"],
     "River": ["river"],
 }
+_WATER_TYPE_PATTERNS = {
+    wtype: re.compile("|".join(map(re.escape, keywords)))
+    for wtype, keywords in WATER_TYPE_KEYWORDS.items()
+}
 
 
 def _classify_zone(value: float, safe_upper: float, warning_upper: float) -> str:
@@ -102,41 +145,93 @@ def _classify_temp_zone(value: float) -> str:
     return "warning"
 
 
-def _classify_single_value(
-    col: str, value: float, safe_up: float | None, warn_up: float | None
-) -> str:
-    """Classify a single value into a zone for a given metric column."""
+ZONE_NAMES = np.array(["safe", "warning", "danger"])
+
+
+def _zone_codes(
+    col: str, values: np.ndarray, safe_up: float | None, warn_up: float | None
+) -> np.ndarray:
+    """Zone of every value as a uint8 index into ZONE_NAMES.
+
+    Each bound a value fails to stay within adds one, so NaN counts as the
+    worst zone, as it does in the scalar classifiers.
+    """
     if col == "min_ndl":
-        return _classify_ndl_zone(value)
+        return (~(values >= NDL_SAFE_LOWER)).astype(np.uint8) + ~(
+            values >= NDL_WARNING_LOWER
+        )
     if col == "avg_temp":
-        return _classify_temp_zone(value)
+        return (~(values >= TEMP_COLD_WARNING)).astype(np.uint8)
     assert safe_up is not None and warn_up is not None
-    return _classify_zone(value, safe_up, warn_up)
+    return (~(values <= safe_up)).astype(np.uint8) + ~(values <= warn_up)
+
+
+def _classify_zones(
+    col: str, values: np.ndarray, safe_up: float | None, warn_up: float | None
+) -> np.ndarray:
+    """Classify every value of a metric column into a zone at once."""
+    return ZONE_NAMES[_zone_codes(col, values, safe_up, warn_up)]
+
+
+def _coordinates(features_df, col: str) -> list[float | None]:
+    if col not in features_df.columns:
+        return [None] * len(features_df)
+    values = features_df[col].to_numpy(dtype=float).tolist()
+    return [round(v, 6) if v != 0 else None for v in values]
+
+
+def _build_dive_features(features_df) -> list[DiveFeature]:
+    """Per-dive features, built column by column rather than row by row."""
+    fields: dict[str, list] = {
+        "dive_number": features_df["dive_number"].astype(str).tolist()
+    }
+    for col, digits in FEATURE_DECIMALS.items():
+        values = features_df[col].to_numpy(dtype=float).tolist()
+        fields[col] = [round(v, digits) for v in values]
+    fields["adverse_conditions"] = [
+        int(v) for v in features_df["adverse_conditions"].tolist()
+    ]
+    fields["dive_site_name"] = _text_column(
+        features_df, "dive_site_name", "N/A"
+    ).tolist()
+    fields["trip_name"] = _text_column(features_df, "trip_name", "N/A").tolist()
+    fields["latitude"] = _coordinates(features_df, "latitude")
+    fields["longitude"] = _coordinates(features_df, "longitude")
+
+    # Every field is explicitly coerced above, so skip validation
+    names = list(fields)
+    return [
+        DiveFeature.model_construct(**dict(zip(names, values, strict=True)))
+        for values in zip(*fields.values(), strict=True)
+    ]
 
 
 def _build_metrics(features_df) -> list[MetricRange]:
     metrics = []
+    dive_numbers = features_df["dive_number"].astype(str).tolist()
+    # Reduce every metric column in one call rather than three per column
+    stats = features_df[[col for col in THRESHOLDS if col in features_df.columns]].agg(
+        ["min", "max", "mean"]
+    )
     for col, (label, unit, safe_up, warn_up) in THRESHOLDS.items():
-        if col not in features_df.columns:
+        if col not in stats.columns:
             continue
         series = features_df[col]
-        min_val = float(series.min())
-        max_val = float(series.max())
-        avg_val = float(series.mean())
+        min_val = float(stats.at["min", col])
+        max_val = float(stats.at["max", col])
+        avg_val = float(stats.at["mean", col])
 
         # Build per-dive values, sorted by value
-        per_dive = []
-        for _, row in features_df.iterrows():
-            val = float(row[col])
-            pt_zone = _classify_single_value(col, val, safe_up, warn_up)
-            per_dive.append(
-                DiveMetricPoint(
-                    dive_number=str(row["dive_number"]),
-                    value=round(val, 2),
-                    zone=pt_zone,
-                )
+        values = series.to_numpy(dtype=float)
+        zones = _classify_zones(col, values, safe_up, warn_up).tolist()
+        rounded = [round(val, 2) for val in values.tolist()]
+        # Fields are already the exact model types, so skip validation
+        per_dive = [
+            DiveMetricPoint.model_construct(
+                dive_number=dive_numbers[i], value=rounded[i], zone=zones[i]
             )
-        per_dive.sort(key=lambda p: p.value)
+            for i in np.argsort(rounded, kind="stable").tolist()
+        ]
 
         if col == "min_ndl":
             zone = _classify_ndl_zone(min_val)
@@ -192,65 +287,60 @@ def _build_metrics(features_df) -> list[MetricRange]:
     return metrics
 
 
-def _compute_danger_score(row) -> float:
-    score = 0.0
-    # NDL: lower is worse (weight 3)
-    if row.get("min_ndl", 999) < NDL_WARNING_LOWER:
-        score += 3.0 * 2
-    elif row.get("min_ndl", 999) < NDL_SAFE_LOWER:
-        score += 3.0
-
-    # Ascent speed (weight 2)
-    ascent = row.get("max_ascend_speed", 0)
-    if ascent > 10:
-        score += 2.0 * 2
-    elif ascent > 9:
-        score += 2.0
-
-    # SAC rate (weight 1)
-    sac = row.get("sac_rate", 0)
-    if sac > 20:
-        score += 1.0 * 2
-    elif sac > 15:
-        score += 1.0
-
-    # Depth (weight 1)
-    depth = row.get("max_depth", 0)
-    if depth > 30:
-        score += 1.0 * 2
-    elif depth > 18:
-        score += 1.0
-
-    # Adverse conditions (weight 5)
-    if row.get("adverse_conditions", 0):
-        score += 5.0
-
-    return score
-
-
-def _identify_issues(row) -> list[str]:
-    issues = []
-    if row.get("max_ascend_speed", 0) > 9:
-        issues.append("rapid ascent")
-    if row.get("min_ndl", 999) < NDL_SAFE_LOWER:
-        issues.append("low NDL")
-    if row.get("sac_rate", 0) > 15:
-        issues.append("high air consumption")
-    if row.get("max_depth", 0) > 30:
-        issues.append("deep dive")
-    if row.get("adverse_conditions", 0):
-        issues.append("adverse conditions")
-    return issues
+def _column(data, col: str, default: float) -> np.ndarray:
+    return np.asarray(data.get(col, default), dtype=float)
+
+
+def _danger_scores(data) -> np.ndarray:
+    """Danger score for a row dict (0-d result) or every row of a DataFrame.
+
+    Each threshold crossed adds its weight, so "danger" levels count twice.
+    """
+    ndl = _column(data, "min_ndl", 999)
+    ascent = _column(data, "max_ascend_speed", 0)
+    sac = _column(data, "sac_rate", 0)
+    depth = _column(data, "max_depth", 0)
+    adverse = _column(data, "adverse_conditions", 0)
+    return (
+        # NDL: lower is worse (weight 3)
+        3.0 * (ndl < NDL_WARNING_LOWER)
+        + 3.0 * (ndl < NDL_SAFE_LOWER)
+        # Ascent speed (weight 2)
+        + 2.0 * (ascent > 10)
+        + 2.0 * (ascent > 9)
+        # SAC rate (weight 1)
+        + 1.0 * (sac > 20)
+        + 1.0 * (sac > 15)
+        # Depth (weight 1)
+        + 1.0 * (depth > 30)
+        + 1.0 * (depth > 18)
+        # Adverse conditions (weight 5)
+        + 5.0 * (adverse != 0)
+    )
+
+
+def _issue_flags(data) -> np.ndarray:
+    """Boolean flags in ISSUE_NAMES order, on the last axis."""
+    return np.stack(
+        [
+            _column(data, "max_ascend_speed", 0) > 9,
+            _column(data, "min_ndl", 999) < NDL_SAFE_LOWER,
+            _column(data, "sac_rate", 0) > 15,
+            _column(data, "max_depth", 0) > 30,
+            _column(data, "adverse_conditions", 0) != 0,
+        ],
+        axis=-1,
+    )
 
 
 def _generate_dive_summaries(
     dives: list[dict],
-) -> list[str]:
+) -> list[str] | None:
     """Ask Gemini to write a short paragraph for each problematic dive.
 
     Each dict in *dives* has keys: dive_number, site, pick_reason, issues, stats.
-    Returns one summary string per dive (same order).
-    Falls back to a simple template if the LLM call fails.
+    Returns one summary string per dive (same order), or None if the LLM
+    call fails or its answer doesn't match the dives.
     """
     prompt_parts = [
         "You are a diving safety analyst. For each dive below, write ONE concise paragraph "
@@ -289,15 +379,26 @@ def _generate_dive_summaries(
         logger.warning(
             "LLM dive summary generation failed, using fallback", exc_info=True
         )
+    return None
+
+
+def _fallback_summaries(dives: list[dict]) -> list[str]:
+    """Simple template summaries used when Gemini is unavailable."""
+    return [
+        f"Dive #{d['dive_number']} at {d['site']} was flagged for "
+        f"{', '.join(d['issues'][:3])}."
+        for d in dives
+    ]
 
-    # Fallback: simple template
-    fallback = []
-    for d in dives:
-        fallback.append(
-            f"Dive #{d['dive_number']} at {d['site']} was flagged for "
-            f"{', '.join(d['issues'][:3])}."
-        )
-    return fallback
+
+async def _summarize_picks(dives: list[dict]) -> tuple[list[str], bool]:
+    """Summaries for the picked dives, and whether Gemini wrote them."""
+    if not dives:
+        return [], True
+    summaries = await asyncio.to_thread(_generate_dive_summaries, dives)
+    if summaries is None:
+        return _fallback_summaries(dives), False
+    return summaries, True
 
 
 def _classify_water_type(avg_temp: float) -> str:
@@ -309,12 +410,20 @@ def _classify_water_type(avg_temp: float) -> str:
     return "Cold water"
 
 
-def _classify_region(lat: float, lon: float) -> str | None:
-    """Classify a dive region from lat/lon using bounding boxes."""
-    for region, (lat_min, lat_max, lon_min, lon_max) in REGION_BOXES.items():
-        if lat_min <= lat <= lat_max and lon_min <= lon <= lon_max:
-            return region
-    return None
+def _classify_regions(lats: np.ndarray, lons: np.ndarray) -> set[str]:
+    """Regions containing any of the given coordinates (first box wins per dive)."""
+    lat = lats[:, None]
+    lon = lons[:, None]
+    lat_min, lat_max, lon_min, lon_max = _REGION_BOUNDS.T
+    inside = (lat_min <= lat) & (lat <= lat_max) & (lon_min <= lon) & (lon <= lon_max)
+    first = inside.argmax(axis=1)[inside.any(axis=1)]
+    return {_REGION_NAMES[i] for i in np.unique(first).tolist()}
+
+
+def _text_column(features_df, col: str, default: str = "") -> pd.Series:
+    if col not in features_df.columns:
+        return pd.Series(default, index=features_df.index)
+    return features_df[col].astype(str)
 
 
 def _classify_experience(dive_count: int, max_depth: float) -> str:
@@ -330,33 +439,34 @@ def _build_diver_profile(features_df) -> DiverProfile:
     """Build a diver profile from aggregated dive features."""
     water_types = set()
     regions = set()
-    dive_sites = []
-
-    for _, row in features_df.iterrows():
-        # Water type from temperature
-        avg_temp = float(row.get("avg_temp", 0))
-        if avg_temp > 0:
-            water_types.add(_classify_water_type(avg_temp))
-
-        # Water type from site/trip name keywords
-        site_name = str(row.get("dive_site_name", ""))
-        trip_name = str(row.get("trip_name", ""))
-        combined = f"{site_name} {trip_name}".lower()
-        for wtype, keywords in WATER_TYPE_KEYWORDS.items():
-            if any(kw in combined for kw in keywords):
-                water_types.add(wtype)
-
-        # Collect unique site names
-        if site_name and site_name != "N/A" and site_name not in dive_sites:
-            dive_sites.append(site_name)
-
-        # Region from coordinates
-        lat = row.get("latitude")
-        lon = row.get("longitude")
-        if lat is not None and lon is not None and lat != 0 and lon != 0:
-            region = _classify_region(float(lat), float(lon))
-            if region:
-                regions.add(region)
+
+    # Water type from temperature
+    if "avg_temp" in features_df.columns:
+        temps = features_df["avg_temp"].to_numpy(dtype=float)
+        water_types.update(
+            _classify_water_type(t) for t in np.unique(temps[temps > 0]).tolist()
+        )
+
+    # Water type from site/trip name keywords, checked once per distinct name
+    site_names = _text_column(features_df, "dive_site_name")
+    combined = pd.Series(
+        pd.unique(site_names.str.cat(_text_column(features_df, "trip_name"), sep=" "))
+    ).str.lower()
+    for wtype, pattern in _WATER_TYPE_PATTERNS.items():
+        if combined.str.contains(pattern).any():
+            water_types.add(wtype)
+
+    # Collect unique site names, in first-seen order
+    dive_sites = [
+        name for name in pd.unique(site_names).tolist() if name and name != "N/A"
+    ]
+
+    # Region from coordinates
+    if "latitude" in features_df.columns and "longitude" in features_df.columns:
+        lats = features_df["latitude"].to_numpy(dtype=float)
+        lons = features_df["longitude"].to_numpy(dtype=float)
+        located = (lats != 0) & (lons != 0)
+        regions = _classify_regions(lats[located], lons[located])
 
     max_depth = float(features_df["max_depth"].max()) if len(features_df) > 0 else 0
     experience_level = _classify_experience(len(features_df), max_depth)
@@ -370,140 +480,160 @@ def _build_diver_profile(features_df) -> DiverProfile:
 
 
 @router.get("/api/dashboard/{session_id}", response_model=DashboardResponse)
-async def get_dashboard(session_id: str):
-    """Compute dashboard data from session dive data. Pure computation, no LLM calls."""
+async def get_dashboard(
+    session_id: str, request: Request, response: Response, summary: bool = False
+):
+    """Serve the session's dashboard, built once per upload and cached.
+
+    The ETag changes whenever the dashboard is rebuilt, so clients polling
+    with If-None-Match get an empty 304 until new dive data is uploaded.
+    With ``summary=1`` the metrics omit their per-dive points.  A dashboard
+    whose summaries fell back to the template is served but not cached, so
+    the next request retries Gemini.
+    """
     agent = get_session(session_id)
     if agent is None:
         raise HTTPException(status_code=404, detail="Session not found")
     if agent.dive_data is None:
         raise HTTPException(status_code=400, detail="No dive data in session")
 
-    features_df = extract_features(agent.dive_data)
-
-    # Build per-dive features list
-    all_dives = []
-    for _, row in features_df.iterrows():
-        lat = row.get("latitude")
-        lon = row.get("longitude")
-        all_dives.append(
-            DiveFeature(
-                dive_number=str(row["dive_number"]),
-                avg_depth=round(float(row["avg_depth"]), 2),
-                max_depth=round(float(row["max_depth"]), 2),
-                depth_variability=round(float(row["depth_variability"]), 2),
-                avg_temp=round(float(row["avg_temp"]), 2),
-                max_temp=round(float(row["max_temp"]), 2),
-                temp_variability=round(float(row["temp_variability"]), 2),
-                avg_pressure=round(float(row["avg_pressure"]), 2),
-                max_pressure=round(float(row["max_pressure"]), 2),
-                pressure_variability=round(float(row["pressure_variability"]), 2),
-                min_ndl=round(float(row["min_ndl"]), 2),
-                sac_rate=round(float(row["sac_rate"]), 2),
-                rating=round(float(row["rating"]), 1),
-                max_ascend_speed=round(float(row["max_ascend_speed"]), 2),
-                high_ascend_speed_count=round(float(row["high_ascend_speed_count"]), 0),
-                adverse_conditions=int(row["adverse_conditions"]),
-                dive_site_name=str(row.get("dive_site_name", "N/A")),
-                trip_name=str(row.get("trip_name", "N/A")),
-                latitude=round(float(lat), 6) if lat is not None and lat != 0 else None,
-                longitude=round(float(lon), 6)
-                if lon is not None and lon != 0
-                else None,
-            )
+    cached = get_cached_dashboard(session_id)
+    if cached is None:
+        # Features are computed once per upload in set_dive_data
+        features_df = agent.features
+        if features_df is None:
+            features_df = extract_features(agent.dive_data)
+        dashboard, complete = await _build_dashboard(session_id, features_df)
+        cached = (uuid.uuid4().hex, dashboard)
+        if complete:
+            cache_dashboard(session_id, cached)
+
+    version, dashboard = cached
+    etag = f'"{version}-summary"' if summary else f'"{version}"'
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    if summary:
+        return dashboard.model_copy(
+            update={
+                "metrics": [
+                    m.model_copy(update={"per_dive": []}) for m in dashboard.metrics
+                ]
+            }
         )
+    return dashboard
 
-    # Compute metrics with per-dive values
-    metrics = _build_metrics(features_df)
+
+async def _build_dashboard(
+    session_id: str, features_df: pd.DataFrame
+) -> tuple[DashboardResponse, bool]:
+    """Compute dashboard data from per-dive features.
+
+    Also returns whether the pick summaries came from Gemini rather than the
+    template fallback.
+    """
+    all_dives = _build_dive_features(features_df)
+    dive_by_number = {d.dive_number: d for d in all_dives}
 
     # Compute aggregate stats
+    totals = features_df.agg(
+        {
+            "max_depth": "mean",
+            "sac_rate": "mean",
+            "max_ascend_speed": "mean",
+            "adverse_conditions": "sum",
+        }
+    )
     aggregate_stats = AggregateStats(
         total_dives=len(features_df),
-        avg_max_depth=round(float(features_df["max_depth"].mean()), 2),
-        avg_sac_rate=round(float(features_df["sac_rate"].mean()), 2),
-        avg_max_ascend_speed=round(float(features_df["max_ascend_speed"].mean()), 2),
-        dives_with_adverse_conditions=int(features_df["adverse_conditions"].sum()),
+        avg_max_depth=round(float(totals["max_depth"]), 2),
+        avg_sac_rate=round(float(totals["sac_rate"]), 2),
+        avg_max_ascend_speed=round(float(totals["max_ascend_speed"]), 2),
+        dives_with_adverse_conditions=int(totals["adverse_conditions"]),
     )
 
-    # Compute danger scores for all dives
-    scored_dives = []
-    for _, row in features_df.iterrows():
-        row_dict = row.to_dict()
-        score = _compute_danger_score(row_dict)
-        if score > 0:
-            issues = _identify_issues(row_dict)
-            scored_dives.append((str(row["dive_number"]), score, row_dict, issues))
-
-    scored_dives.sort(key=lambda x: x[1], reverse=True)
+    # Compute danger scores for all dives, highest first (ties keep log order)
+    scores = _danger_scores(features_df)
+    flags = _issue_flags(features_df)
+    scored = np.flatnonzero(scores > 0)
+    scored = scored[np.argsort(-scores[scored], kind="stable")]
+    scored_flags = flags[scored]
+
+    def scored_dive(k: int) -> tuple[str, float, int, list[str]]:
+        # Issue lists are only built for the (at most 3) picked dives
+        i = int(scored[k])
+        issues = [
+            name
+            for name, flag in zip(ISSUE_NAMES, scored_flags[k], strict=True)
+            if flag
+        ]
+        return all_dives[i].dive_number, float(scores[i]), i, issues
 
     # Pick top 3 for different primary reasons where possible
     picks: list[
-        tuple[str, float, dict, list[str], str]
-    ] = []  # (dn, score, row, issues, pick_issue)
-    used_dive_nums: set[str] = set()
-    used_pick_issues: set[str] = set()
+        tuple[str, float, int, list[str], str]
+    ] = []  # (dn, score, row position, issues, pick_reason)
+    used = np.zeros(len(scored), dtype=bool)
 
     # First pass: for each issue category, pick the dive with the worst
     # value for that specific metric (not overall danger score)
-    for pick_issue in [
-        "rapid ascent",
-        "low NDL",
-        "high air consumption",
-        "deep dive",
-        "adverse conditions",
-    ]:
+    for issue_idx, (rank_col, higher_is_worse) in enumerate(ISSUE_RANK_KEY):
         if len(picks) >= 3:
             break
-        rank_col, higher_is_worse = ISSUE_RANK_KEY[pick_issue]
-        best: tuple[str, float, dict, list[str], str] | None = None
-        best_metric_val: float = 0.0
-        for dive_num, score, row_dict, issues in scored_dives:
-            if dive_num in used_dive_nums:
-                continue
-            if pick_issue in issues and pick_issue not in used_pick_issues:
-                val = float(row_dict.get(rank_col, 0))
-                if best is None or (
-                    (higher_is_worse and val > best_metric_val)
-                    or (not higher_is_worse and val < best_metric_val)
-                ):
-                    best = (dive_num, score, row_dict, issues, pick_issue)
-                    best_metric_val = val
-        if best:
-            used_dive_nums.add(best[0])
-            used_pick_issues.add(best[4])
-            picks.append(best)
+        candidates = scored_flags[:, issue_idx] & ~used
+        if not candidates.any():
+            continue
+        metric = np.broadcast_to(_column(features_df, rank_col, 0), scores.shape)
+        metric = metric[scored]
+        # arg{max,min} return the first extreme, i.e. the most dangerous dive
+        if higher_is_worse:
+            best = int(np.argmax(np.where(candidates, metric, -np.inf)))
+        else:
+            best = int(np.argmin(np.where(candidates, metric, np.inf)))
+        used[best] = True
+        picks.append((*scored_dive(best), PICK_REASONS[issue_idx]))
 
     # Second pass: fill remaining slots from highest overall danger score
-    for dive_num, score, row_dict, issues in scored_dives:
+    for k in np.flatnonzero(~used).tolist():
         if len(picks) >= 3:
             break
-        if dive_num in used_dive_nums:
-            continue
-        primary = issues[0] if issues else "rapid ascent"
-        picks.append((dive_num, score, row_dict, issues, primary))
-        used_dive_nums.add(dive_num)
+        # First flagged issue; argmax of no flags is 0, i.e. "rapid ascent"
+        primary = int(np.argmax(scored_flags[k]))
+        picks.append((*scored_dive(k), PICK_REASONS[primary]))
 
     # Sort picks by danger score
     picks.sort(key=lambda x: x[1], reverse=True)
 
     # Generate LLM summaries for all picks in one call
+    # Only the picked dives need full row dicts
+    picked_rows = features_df.iloc[[pick[2] for pick in picks]].to_dict(
+        orient="records"
+    )
     llm_inputs = []
-    for dn, _sc, rd, iss, pi in picks:
+    for (dn, _sc, _pos, iss, reason), rd in zip(picks, picked_rows, strict=True):
         site = rd.get("dive_site_name", "N/A")
         llm_inputs.append(
             {
                 "dive_number": dn,
                 "site": site if site and site != "N/A" else "unknown site",
-                "pick_reason": PICK_REASONS.get(pi, "Most dangerous overall"),
+                "pick_reason": reason,
                 "issues": [i for i in iss if i != "adverse conditions"],
                 "stats": rd,
             }
         )
 
-    summaries = _generate_dive_summaries(llm_inputs) if llm_inputs else []
+    # The Gemini call blocks on network I/O, so run it in a worker thread
+    # alongside the metric and profile builds instead of on the event loop
+    (summaries, generated), metrics, diver_profile = await asyncio.gather(
+        _summarize_picks(llm_inputs),
+        asyncio.to_thread(_build_metrics, features_df),
+        asyncio.to_thread(_build_diver_profile, features_df),
+    )
 
     top_problematic_dives = []
-    for i, (dn, sc, _rd, iss, pi) in enumerate(picks):
-        feature = next(d for d in all_dives if d.dive_number == dn)
+    for i, (dn, sc, _pos, iss, reason) in enumerate(picks):
+        feature = dive_by_number[dn]
         top_problematic_dives.append(
             ProblematicDive(
                 dive_number=dn,
@@ -511,14 +641,11 @@ async def get_dashboard(session_id: str):
                 features=feature,
                 issues=iss,
                 summary=summaries[i] if i < len(summaries) else "",
-                pick_reason=PICK_REASONS.get(pi, "Most dangerous overall"),
+                pick_reason=reason,
             )
         )
 
-    # Build diver profile
-    diver_profile = _build_diver_profile(features_df)
-
-    return DashboardResponse(
+    dashboard = DashboardResponse(
         session_id=session_id,
         aggregate_stats=aggregate_stats,
         metrics=metrics,
@@ -526,3 +653,4 @@ async def get_dashboard(session_id: str):
         top_problematic_dives=top_problematic_dives,
         diver_profile=diver_profile,
     )
+    return dashboard, generated
@@ -1,9 +1,6 @@
-import os
-import tempfile
-
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile
 
-from src.api.dependencies import get_or_create_session
+from src.api.dependencies import get_or_create_session, invalidate_dashboard
 from src.api.models import UploadResponse
 from src.parsers import get_parser
 
@@ -22,24 +19,18 @@ async def upload_dive_log(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from None
 
-    # Write to temp file for parsing
-    suffix = os.path.splitext(filename)[1]
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
-
+    # Parse straight from the upload's spooled file; no temp-file copy needed
+    await file.seek(0)
     try:
-        df = parser.parse(tmp_path)
+        df = parser.parse(file.file)
     except Exception as e:
         raise HTTPException(
             status_code=400, detail=f"Failed to parse file: {str(e)}"
         ) from None
-    finally:
-        os.unlink(tmp_path)
 
     sid, agent = get_or_create_session(session_id)
     agent.set_dive_data(df)
+    invalidate_dashboard(sid)
     dive_numbers = agent.get_dive_numbers()
 
     return UploadResponse(
@@ -17,9 +17,18 @@ class Settings(BaseSettings):
     RAG_TOP_K: int = 10
     CHUNK_SIZE: int = 2000
     CHUNK_OVERLAP: int = 100
+    VECTOR_INDEX_MIN_ROWS: int = 100_000
 
     # Prompt
     PROMPT_VERSION: int = 3
+    PROMPT_CACHE_TTL_SECONDS: float = 300.0
+
+    # Conversation
+    CHAT_HISTORY_MAX_EXCHANGES: int = 20
+
+    # Sessions
+    MAX_SESSIONS: int = 1000
+    SESSION_TTL_SECONDS: float = 3600.0
 
     # Phoenix
     PHOENIX_COLLECTOR_ENDPOINT: str = "http://localhost:6006/v1/traces"
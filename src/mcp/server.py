@@ -17,6 +17,7 @@ import logging
 import pandas as pd
 from mcp.server.fastmcp import FastMCP
 
+from src.agent.tools import dive_key
 from src.analysis.feature_engineering import extract_features
 from src.parsers import get_parser
 from src.rag.search import create_text_report, retrieve_context
@@ -36,6 +37,15 @@ mcp = FastMCP(
 # Session state — holds parsed dive data for the current MCP session
 # ---------------------------------------------------------------------------
 _dive_data: pd.DataFrame | None = None
+# (frame, per-dive frames) for the last DataFrame split by _group_dives
+_dive_groups: tuple[pd.DataFrame, dict[str, pd.DataFrame]] | None = None
+# Feature rows computed by analyze_dive_profile for that split, by dive key
+_dive_features: dict[str, pd.Series] = {}
+# (frame, list_dives output) for the last DataFrame listed
+_dive_listing: tuple[pd.DataFrame, str] | None = None
+
+# Dive numbers listed by name in the parse summary; the rest are counted
+_MAX_LISTED_DIVES = 50
 
 
 def _get_dive_data() -> pd.DataFrame:
@@ -44,15 +54,28 @@ def _get_dive_data() -> pd.DataFrame:
     return _dive_data
 
 
+def _group_dives(df: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """Split df into per-dive frames keyed by str(dive_number), in sorted order.
+
+    The split is cached for the most recently loaded DataFrame, so each tool
+    call is a dict lookup instead of a scan over every sample.
+    """
+    global _dive_groups
+    if _dive_groups is None or _dive_groups[0] is not df:
+        groups = {
+            str(dn): group
+            for dn, group in df.groupby("dive_number", sort=True, observed=True)
+        }
+        _dive_groups = (df, groups)
+        _dive_features.clear()
+    return _dive_groups[1]
+
+
 def _filter_dive(df: pd.DataFrame, dive_number: str) -> pd.DataFrame:
     """Filter DataFrame to a specific dive, handling type coercion."""
-    import contextlib
-
-    result = df[df["dive_number"] == dive_number]
-    if result.empty:
-        with contextlib.suppress(ValueError, TypeError):
-            result = df[df["dive_number"] == int(dive_number)]
-    return result
+    groups = _group_dives(df)
+    group = groups.get(dive_key(groups, dive_number))
+    return group if group is not None else df.iloc[:0]
 
 
 # ---------------------------------------------------------------------------
@@ -91,9 +114,21 @@ def parse_dive_log(file_path: str) -> str:
     global _dive_data
     parser = get_parser(file_path)
     _dive_data = parser.parse(file_path)
+    # Repeated per-sample labels are cheaper to filter and group as categories
+    _dive_data = _dive_data.astype(
+        {
+            c: "category"
+            for c in ("dive_number", "dive_site_name", "trip_name")
+            if c in _dive_data.columns
+        }
+    )
     dive_numbers = sorted(_dive_data["dive_number"].unique().tolist())
+    # Bound the enumeration so large logs don't flood the model's context
+    shown = ", ".join(map(str, dive_numbers[:_MAX_LISTED_DIVES]))
+    if len(dive_numbers) > _MAX_LISTED_DIVES:
+        shown += f", ... and {len(dive_numbers) - _MAX_LISTED_DIVES} more"
     return (
-        f"Parsed {len(dive_numbers)} dives: {dive_numbers}\n"
+        f"Parsed {len(dive_numbers)} dives: {shown}\n"
         f"Total samples: {len(_dive_data)}\n"
         f"Use analyze_dive_profile or get_dive_summary with a dive number."
     )
@@ -107,17 +142,20 @@ def analyze_dive_profile(dive_number: str) -> str:
     high air consumption (SAC >20 l/min), deep dives (>30m), and adverse
     conditions. Returns detailed metrics and flagged issues.
     """
-    df = _get_dive_data()
-    dive_df = _filter_dive(df, dive_number)
+    groups = _group_dives(_get_dive_data())
+    key = dive_key(groups, dive_number)
+    dive_df = groups.get(key)
 
-    if dive_df.empty:
+    if dive_df is None or dive_df.empty:
         return f"No data found for dive number {dive_number}."
 
-    features = extract_features(dive_df)
-    if features.empty:
-        return f"Could not extract features for dive {dive_number}."
-
-    row = features.iloc[0]
+    # Repeat analyses of the same dive reuse its feature row
+    row = _dive_features.get(key)
+    if row is None:
+        features = extract_features(dive_df)
+        if features.empty:
+            return f"Could not extract features for dive {dive_number}."
+        row = _dive_features[key] = features.iloc[0]
     issues: list[str] = []
 
     if row.get("max_ascend_speed", 0) > 10:
@@ -178,17 +216,25 @@ def get_dive_summary(dive_number: str) -> str:
 @mcp.tool()
 def list_dives() -> str:
     """List all dives in the currently loaded dive log with basic info."""
+    global _dive_listing
     df = _get_dive_data()
-    dive_nums = sorted(df["dive_number"].unique().tolist())
-    lines = []
-    for dn in dive_nums:
-        dive_df = _filter_dive(df, str(dn))
-        first = dive_df.iloc[0]
-        site = first.get("dive_site_name", "Unknown")
-        max_depth = dive_df["depth"].max()
-        rating = first.get("rating", "N/A")
-        lines.append(f"  #{dn}: {site} — {max_depth:.1f}m max — rating {rating}/5")
-    return f"Loaded dives ({len(dive_nums)}):\n" + "\n".join(lines)
+    if _dive_listing is not None and _dive_listing[0] is df:
+        return _dive_listing[1]
+    # One grouped pass over the samples gives every dive's summary columns
+    aggs = {"max_depth": ("depth", "max")}
+    if "dive_site_name" in df.columns:
+        aggs["site"] = ("dive_site_name", "first")
+    if "rating" in df.columns:
+        aggs["rating"] = ("rating", "first")
+    summary = df.groupby("dive_number", sort=True, observed=True).agg(**aggs)
+    lines = [
+        f"  #{dn}: {r.get('site', 'Unknown')} — {r['max_depth']:.1f}m max"
+        f" — rating {r.get('rating', 'N/A')}/5"
+        for dn, r in summary.to_dict("index").items()
+    ]
+    listing = f"Loaded dives ({len(summary)}):\n" + "\n".join(lines)
+    _dive_listing = (df, listing)
+    return listing
 
 
 @mcp.tool()
@@ -1,3 +1,5 @@
+import os
+
 from src.parsers.base import DiveLogParser
 from src.parsers.subsurface import SubsurfaceParser
 
@@ -6,11 +8,18 @@ PARSER_REGISTRY: dict[str, type[DiveLogParser]] = {
     ".xml": SubsurfaceParser,
 }
 
+# Parsers hold no state, so one instance per extension is shared
+_PARSER_INSTANCES: dict[str, DiveLogParser] = {}
+
 
 def get_parser(filename: str) -> DiveLogParser:
     """Return the appropriate parser for a given filename."""
-    for ext, parser_cls in PARSER_REGISTRY.items():
-        if filename.lower().endswith(ext):
-            return parser_cls()
-    supported = ", ".join(PARSER_REGISTRY.keys())
-    raise ValueError(f"Unsupported file type: {filename}. Supported: {supported}")
+    ext = os.path.splitext(filename)[1].lower()
+    parser_cls = PARSER_REGISTRY.get(ext)
+    if parser_cls is None:
+        supported = ", ".join(PARSER_REGISTRY.keys())
+        raise ValueError(f"Unsupported file type: {filename}. Supported: {supported}")
+    parser = _PARSER_INSTANCES.get(ext)
+    if parser is None:
+        parser = _PARSER_INSTANCES[ext] = parser_cls()
+    return parser
@@ -1,12 +1,13 @@
 from abc import ABC, abstractmethod
+from typing import IO
 
 import pandas as pd
 
 
 class DiveLogParser(ABC):
     @abstractmethod
-    def parse(self, file_path: str) -> pd.DataFrame:
-        """Parse a dive log file and return a DataFrame of per-sample dive data."""
+    def parse(self, source: str | IO[bytes]) -> pd.DataFrame:
+        """Parse a dive log (a path or a binary file object) into per-sample rows."""
         ...
 
     @abstractmethod
@@ -1,10 +1,27 @@
 import contextlib
 import xml.etree.ElementTree as ET
+from typing import IO
 
 import pandas as pd
 
 from src.parsers.base import DiveLogParser
 
+_COLUMNS = (
+    "dive_number",
+    "trip_name",
+    "dive_site_name",
+    "time",
+    "depth",
+    "temperature",
+    "pressure",
+    "rbt",
+    "ndl",
+    "sac_rate",
+    "rating",
+    "latitude",
+    "longitude",
+)
+
 
 def time_to_minutes(time_str):
     """Convert a time string (MM:SS or raw minutes) to total seconds as float."""
@@ -14,99 +31,131 @@ def time_to_minutes(time_str):
     return float(time_str)
 
 
-def extract_all_dive_profiles_refined(root):
-    """Extract dive profiles for all dives from a Subsurface XML root element.
+def _walk(element):
+    """Yield ("start", elem) / ("end", elem) events for an in-memory tree."""
+    yield "start", element
+    for child in element:
+        yield from _walk(child)
+    yield "end", element
+
+
+def _site_info(site):
+    gps = site.attrib.get("gps", "")
+    lat, lon = None, None
+    if gps:
+        parts = gps.strip().split()
+        if len(parts) == 2:
+            with contextlib.suppress(ValueError):
+                lat, lon = float(parts[0]), float(parts[1])
+    return {
+        "name": site.attrib.get("name", "N/A"),
+        "latitude": lat,
+        "longitude": lon,
+    }
+
+
+def extract_all_dive_profiles_refined(source):
+    """Extract dive profiles for all dives from a Subsurface XML log.
+
+    ``source`` is either an already-parsed root element or a path / binary
+    file object; the latter is streamed with ``iterparse`` and each dive is
+    discarded once its samples are read, so the full tree is never held.
 
     Returns a DataFrame with per-sample rows containing dive_number, trip_name,
     dive_site_name, time, depth, temperature, pressure, rbt, ndl, sac_rate, rating.
     """
-    dive_data = []
+    streaming = not isinstance(source, ET.Element)
+    events = (
+        ET.iterparse(source, events=("start", "end")) if streaming else _walk(source)
+    )
 
-    # Create a map of divesite UUIDs to their names and GPS coordinates
     divesites = {}
-    for ds in root.findall(".//site"):
-        gps = ds.attrib.get("gps", "")
-        lat, lon = None, None
-        if gps:
-            parts = gps.strip().split()
-            if len(parts) == 2:
-                with contextlib.suppress(ValueError):
-                    lat, lon = float(parts[0]), float(parts[1])
-        divesites[ds.attrib["uuid"]] = {
-            "name": ds.attrib.get("name", "N/A"),
-            "latitude": lat,
-            "longitude": lon,
-        }
-    # Track dive sites outside of trip tags
+    # Dives listed directly inside a trip tag, by dive number
     trip_map = {}
-    for trip in root.findall(".//trip"):
-        trip_name = trip.attrib.get("location", "N/A")
-        for dive in trip.findall("dive"):
-            dive_number = dive.attrib.get("number", "N/A")
-            trip_map[dive_number] = trip_name
-    # Extract dive profiles
-    for dive in root.findall(".//dive"):
-        dive_number = dive.attrib.get("number", "N/A")
-        trip_name = trip_map.get(dive_number, "N/A")
-        dive_site_uuid = dive.attrib.get("divesiteid", "N/A")
-        site_info = divesites.get(
-            dive_site_uuid, {"name": "N/A", "latitude": None, "longitude": None}
-        )
-        dive_site_name = site_info["name"]
-        latitude = site_info["latitude"]
-        longitude = site_info["longitude"]
-
-        sac_rate = dive.attrib.get("sac", "N/A").replace(" l/min", "")
-        rating = dive.attrib.get("rating", "N/A")
-        for sample in dive.findall(".//sample"):
-            time = sample.attrib.get("time", "N/A").replace(" min", "")
-            depth = sample.attrib.get("depth", "N/A").replace(" m", "")
-            temperature = (
-                sample.attrib.get("temp", "N/A").replace(" C", "")
-                if "temp" in sample.attrib
-                else None
-            )
-            pressure = (
-                sample.attrib.get("pressure", "N/A").replace(" bar", "")
-                if "pressure" in sample.attrib
-                else None
-            )
-            rbt = (
-                sample.attrib.get("rbt", "N/A").replace(":00 min", "")
-                if "rbt" in sample.attrib
-                else None
-            )
-            ndl = (
-                sample.attrib.get("ndl", "N/A").replace(":00 min", "")
-                if "ndl" in sample.attrib
-                else None
+    # Per-dive values, resolved against sites and trips once the log is read
+    dives = []
+    # Sample values go into one list per column; per-dive values are repeated
+    # once per kept sample instead of being copied into every row
+    columns: dict[str, list] = {name: [] for name in _COLUMNS}
+    open_elements = []
+    dive_depth = 0
+    kept = 0
+    for event, elem in events:
+        tag = elem.tag
+        if event == "start":
+            open_elements.append(elem)
+            if tag == "dive":
+                dive_depth += 1
+            continue
+        open_elements.pop()
+
+        if tag == "sample":
+            if not dive_depth:
+                continue
+            attrib = elem.attrib
+            time = attrib.get("time", "N/A").replace(" min", "")
+            depth = attrib.get("depth", "N/A").replace(" m", "")
+            if time == "N/A" or depth == "N/A":
+                continue
+            temperature = attrib.get("temp", "").replace(" C", "")
+            pressure = attrib.get("pressure", "").replace(" bar", "")
+            rbt = attrib.get("rbt", "").replace(":00 min", "")
+            ndl = attrib.get("ndl", "").replace(":00 min", "")
+
+            columns["time"].append(time_to_minutes(time))
+            columns["depth"].append(float(depth))
+            columns["temperature"].append(float(temperature) if temperature else None)
+            columns["pressure"].append(float(pressure) if pressure else None)
+            columns["rbt"].append(float(rbt) if rbt else None)
+            columns["ndl"].append(float(ndl) if ndl else None)
+            kept += 1
+        elif tag == "dive":
+            dive_depth -= 1
+            dive_number = elem.attrib.get("number", "N/A")
+            if open_elements and open_elements[-1].tag == "trip":
+                trip_map[dive_number] = open_elements[-1].attrib.get("location", "N/A")
+            sac_rate = elem.attrib.get("sac", "N/A").replace(" l/min", "")
+            rating = elem.attrib.get("rating", "N/A")
+            dives.append(
+                (
+                    dive_number,
+                    elem.attrib.get("divesiteid", "N/A"),
+                    float(sac_rate) if sac_rate != "N/A" else None,
+                    int(rating) if rating and rating != "N/A" else None,
+                    kept,
+                )
             )
+            kept = 0
+        elif tag == "site":
+            divesites[elem.attrib["uuid"]] = _site_info(elem)
+        else:
+            continue
+        if streaming:
+            elem.clear()
+
+    if not columns["time"]:
+        return pd.DataFrame()
 
-            if time != "N/A" and depth != "N/A":
-                data_point = {
-                    "dive_number": dive_number,
-                    "trip_name": trip_name,
-                    "dive_site_name": dive_site_name,
-                    "time": time_to_minutes(time),
-                    "depth": float(depth),
-                    "temperature": float(temperature) if temperature else None,
-                    "pressure": float(pressure) if pressure else None,
-                    "rbt": float(rbt) if rbt else None,
-                    "ndl": float(ndl) if ndl else None,
-                    "sac_rate": float(sac_rate) if sac_rate != "N/A" else None,
-                    "rating": int(rating) if rating and rating != "N/A" else None,
-                    "latitude": latitude,
-                    "longitude": longitude,
-                }
-                dive_data.append(data_point)
-    return pd.DataFrame(dive_data)
+    no_site = {"name": "N/A", "latitude": None, "longitude": None}
+    for dive_number, site_uuid, sac_rate, rating, count in dives:
+        site_info = divesites.get(site_uuid, no_site)
+        per_dive = {
+            "dive_number": dive_number,
+            "trip_name": trip_map.get(dive_number, "N/A"),
+            "dive_site_name": site_info["name"],
+            "sac_rate": sac_rate,
+            "rating": rating,
+            "latitude": site_info["latitude"],
+            "longitude": site_info["longitude"],
+        }
+        for name, value in per_dive.items():
+            columns[name].extend([value] * count)
+    return pd.DataFrame(columns)
 
 
 class SubsurfaceParser(DiveLogParser):
-    def parse(self, file_path: str) -> pd.DataFrame:
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-        return extract_all_dive_profiles_refined(root)
+    def parse(self, source: str | IO[bytes]) -> pd.DataFrame:
+        return extract_all_dive_profiles_refined(source)
 
     def supported_extensions(self) -> list[str]:
         return [".ssrf", ".xml"]
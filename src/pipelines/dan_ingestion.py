@@ -1,7 +1,12 @@
 """CLI script to run DAN content ingestion."""
 
+import logging
+
 from src.rag.ingestion import run_pipeline
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s"
+    )
     table_name = run_pipeline()
     print(f"DAN data ingested. Table: {table_name}")
@@ -1,3 +1,5 @@
+import functools
+import itertools
 import logging
 import re
 from typing import Any
@@ -8,6 +10,7 @@ from bs4 import BeautifulSoup
 from dlt.destinations.adapters import lancedb_adapter
 from dlt.sources.helpers.rest_client.paginators import PageNumberPaginator
 from dlt.sources.rest_api import rest_api_source
+from lancedb.index import HnswSq
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from requests import Response
 
@@ -15,6 +18,8 @@ from src.config import settings
 
 logger = logging.getLogger(__name__)
 
+_WHITESPACE_RE = re.compile(r"\s+")
+
 
 class WordPressPaginator(PageNumberPaginator):
     """WordPress API returns 400 when requesting a page beyond the last one.
@@ -31,25 +36,37 @@ class WordPressPaginator(PageNumberPaginator):
 
 def remove_html_tags(text):
     """Remove HTML tags, JavaScript, and extra spaces from a string."""
-    soup = BeautifulSoup(text, "html.parser")
+    # lxml's C parser is much faster than the pure-Python html.parser
+    soup = BeautifulSoup(text, "lxml")
 
     for script in soup(["script", "iframe"]):
         script.extract()
 
     cleaned_text = soup.get_text(separator=" ")
-    cleaned_text = re.sub(r"\s+", " ", cleaned_text).strip()
+    cleaned_text = _WHITESPACE_RE.sub(" ", cleaned_text).strip()
 
     return cleaned_text
 
 
+@functools.lru_cache(maxsize=8)
+def _get_splitter(
+    chunk_size: int, chunk_overlap: int
+) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    )
+
+
 def chunk_text(text, chunk_size=None, chunk_overlap=None):
     """Split text into chunks using RecursiveCharacterTextSplitter."""
     chunk_size = chunk_size or settings.CHUNK_SIZE
     chunk_overlap = chunk_overlap or settings.CHUNK_OVERLAP
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size, chunk_overlap=chunk_overlap
-    )
-    return text_splitter.split_text(text)
+    if len(text) <= chunk_size:
+        # A short text is its own single chunk, stripped as the splitter would
+        text = text.strip()
+        return [text] if text else []
+    # Splitters are stateless between calls, so one per configuration is reused
+    return _get_splitter(chunk_size, chunk_overlap).split_text(text)
 
 
 def _make_resource(name: str, path: str) -> Any:
@@ -58,6 +75,13 @@ def _make_resource(name: str, path: str) -> Any:
         "name": name,
         "endpoint": {
             "path": path,
+            # Resources are fetched concurrently, so each needs its own
+            # paginator state
+            "paginator": WordPressPaginator(
+                base_page=1,
+                page_param="page",
+                total_path=None,
+            ),
             "params": {
                 "per_page": settings.DAN_PER_PAGE,
             },
@@ -80,15 +104,12 @@ def wordpress_rest_api_source():
         {
             "client": {
                 "base_url": settings.DAN_BASE_URL,
-                "paginator": WordPressPaginator(
-                    base_page=1,
-                    page_param="page",
-                    total_path=None,
-                ),
             },
             "resource_defaults": {
                 "primary_key": "id",
                 "write_disposition": "merge",
+                # The endpoints are independent, so page through them in parallel
+                "parallelized": True,
             },
             "resources": [
                 _make_resource("dan_health_resources", "dan_health_resources"),
@@ -100,23 +121,29 @@ def wordpress_rest_api_source():
     )
 
 
-_chunk_count = 0
+# Progress is logged every N articles rather than for each one
+_LOG_EVERY_N_ARTICLES = 50
+_article_counter = itertools.count(1)
 
 
 @dlt.transformer()
 def dan_articles(article):
     """Transform DAN articles into text chunks for vectorization."""
-    global _chunk_count
+    raw = article.get("content", {}).get("rendered", "")
+    if not raw or raw.isspace():
+        # Stub posts have nothing to extract, chunk or embed
+        return
     title = article.get("title", {}).get("rendered", "unknown")
-    clean_content = remove_html_tags(article["content"]["rendered"])
+    clean_content = remove_html_tags(raw)
     chunks = chunk_text(clean_content)
-    _chunk_count += len(chunks)
-    logger.info(
-        "Chunked article '%s' -> %d chunks (total: %d)",
-        title,
-        len(chunks),
-        _chunk_count,
-    )
+    article_number = next(_article_counter)
+    if article_number % _LOG_EVERY_N_ARTICLES == 0:
+        logger.info(
+            "Chunked %d articles (latest: '%s' -> %d chunks)",
+            article_number,
+            title,
+            len(chunks),
+        )
     url = article.get("link", "")
     for chunk in chunks:
         yield {"value": chunk, "title": title, "url": url}
@@ -124,12 +151,8 @@ def dan_articles(article):
 
 def run_pipeline(*args, **kwargs):
     """Run the DAN articles ingestion pipeline into LanceDB."""
-    global _chunk_count
-    _chunk_count = 0
-
-    logging.basicConfig(
-        level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s"
-    )
+    global _article_counter
+    _article_counter = itertools.count(1)
 
     logger.info("Starting DAN ingestion pipeline...")
     logger.info("Base URL: %s", settings.DAN_BASE_URL)
@@ -157,7 +180,14 @@ def run_pipeline(*args, **kwargs):
     dbtable = db.open_table(settings.LANCEDB_TABLE_NAME)
     dbtable.create_fts_index("value", replace=True)
 
+    # Brute-force vector search is exact and fast on small tables; an ANN
+    # index only pays off (and trains well) once there are enough rows
     row_count = dbtable.count_rows()
+    if row_count >= settings.VECTOR_INDEX_MIN_ROWS:
+        logger.info("Building vector index...")
+        # Default l2 metric, matching the distance hybrid search queries with
+        dbtable.create_index("vector", config=HnswSq())
+
     logger.info("Done! Table '%s' has %d rows.", settings.LANCEDB_TABLE_NAME, row_count)
 
     return settings.LANCEDB_TABLE_NAME
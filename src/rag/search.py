@@ -1,9 +1,26 @@
+import functools
+
 import lancedb
 
 from src.config import settings
 from src.observability import get_tracer
 
 
+@functools.lru_cache(maxsize=4)
+def _connect(uri: str):
+    """Connect to a LanceDB database once and reuse the connection."""
+    return lancedb.connect(uri)
+
+
+def open_table(uri: str, table_name: str):
+    """Open a LanceDB table on the shared connection.
+
+    A table handle is pinned to the version it opened, so it is opened per
+    query to pick up tables re-ingested by another process.
+    """
+    return _connect(uri).open_table(table_name)
+
+
 def hybrid_search(dbtable, query: str, top_k: int | None = None) -> str:
     """Perform hybrid search (semantic + FTS) on a LanceDB table.
 
@@ -15,14 +32,23 @@ def hybrid_search(dbtable, query: str, top_k: int | None = None) -> str:
         attributes={"openinference.span.kind": "RETRIEVER"},
     ):
         top_k = top_k or settings.RAG_TOP_K
-        query_results = dbtable.search(query, query_type="hybrid").to_pandas()
-        results = query_results.sort_values(
-            "_relevance_score", ascending=True
-        ).nlargest(top_k, "_relevance_score")
-        context = "\n".join(results["value"])
+        # Hybrid results come back reranked, so only the top_k rows are fetched
+        results = dbtable.search(query, query_type="hybrid").limit(top_k).to_arrow()
+        # Read the text column straight from Arrow; no DataFrame is needed
+        context = "\n".join(results.column("value").to_pylist())
         return context
 
 
+def _snippet(text: str) -> str:
+    """Truncate a chunk to its first sentence for display."""
+    dot_pos = text.find(". ")
+    if dot_pos > 0:
+        return text[: dot_pos + 1]
+    if len(text) > 150:
+        return text[:147] + "..."
+    return text
+
+
 def search_dan_articles(query: str, top_k: int = 3) -> list[dict]:
     """Search DAN articles and return metadata + snippet for each result."""
     tracer = get_tracer()
@@ -31,38 +57,26 @@ def search_dan_articles(query: str, top_k: int = 3) -> list[dict]:
         attributes={"openinference.span.kind": "RETRIEVER"},
     ):
         try:
-            db = lancedb.connect(settings.LANCEDB_URI)
-            dbtable = db.open_table(settings.LANCEDB_TABLE_NAME)
-            query_results = dbtable.search(query, query_type="hybrid").to_pandas()
-            results = query_results.sort_values(
-                "_relevance_score", ascending=True
-            ).nlargest(top_k, "_relevance_score")
-
-            has_metadata = "title" in results.columns and "url" in results.columns
-
-            articles = []
-            seen_urls = set()
-            for _, row in results.iterrows():
-                snippet = str(row.get("value", ""))
-                # Truncate to first sentence only
-                dot_pos = snippet.find(". ")
-                if dot_pos > 0:
-                    snippet = snippet[: dot_pos + 1]
-                elif len(snippet) > 150:
-                    snippet = snippet[:147] + "..."
-
-                if has_metadata:
-                    url = str(row.get("url", ""))
-                    title = str(row.get("title", ""))
-                    if url and url in seen_urls:
-                        continue
-                    if url:
-                        seen_urls.add(url)
-                else:
-                    url = ""
-                    title = ""
-
-                articles.append({"title": title, "url": url, "snippet": snippet})
+            dbtable = open_table(settings.LANCEDB_URI, settings.LANCEDB_TABLE_NAME)
+            results = (
+                dbtable.search(query, query_type="hybrid").limit(top_k).to_pandas()
+            )
+
+            # Keep the first (most relevant) hit per URL; rows without one stay
+            if "title" in results.columns and "url" in results.columns:
+                urls = results["url"].astype(str)
+                results = results[(urls == "") | ~urls.duplicated()]
+                urls = results["url"].astype(str).tolist()
+                titles = results["title"].astype(str).tolist()
+            else:
+                urls = titles = [""] * len(results)
+
+            articles = [
+                {"title": title, "url": url, "snippet": _snippet(value)}
+                for value, title, url in zip(
+                    results["value"].astype(str).tolist(), titles, urls, strict=True
+                )
+            ]
             return articles
         except Exception:
             return []
@@ -75,19 +89,26 @@ def retrieve_context(query: str, top_k: int | None = None) -> str:
         "rag.retrieve_context",
         attributes={"openinference.span.kind": "RETRIEVER"},
     ):
-        db = lancedb.connect(settings.LANCEDB_URI)
-        dbtable = db.open_table(settings.LANCEDB_TABLE_NAME)
+        dbtable = open_table(settings.LANCEDB_URI, settings.LANCEDB_TABLE_NAME)
         return hybrid_search(dbtable, query, top_k)
 
 
+class _ReportFields(dict):
+    def __missing__(self, key):
+        return "N/A"
+
+
+_REPORT_TEMPLATE = (
+    "Average depth {avg_depth} meters, "
+    "Maximum depth {max_depth} meters, "
+    "Depth variability {depth_variability} meters, "
+    "SAC rate {sac_rate}, "
+    "High Speed Ascend instances {high_ascend_speed_count}, "
+    "Max Ascend Speed {max_ascend_speed} meters per min, "
+    "Minimal NDL {min_ndl} minutes."
+)
+
+
 def create_text_report(report: dict) -> str:
     """Convert dive feature data into a natural language description."""
-    return (
-        f"Average depth {report.get('avg_depth', 'N/A')} meters, "
-        f"Maximum depth {report.get('max_depth', 'N/A')} meters, "
-        f"Depth variability {report.get('depth_variability', 'N/A')} meters, "
-        f"SAC rate {report.get('sac_rate', 'N/A')}, "
-        f"High Speed Ascend instances {report.get('high_ascend_speed_count', 'N/A')}, "
-        f"Max Ascend Speed {report.get('max_ascend_speed', 'N/A')} meters per min, "
-        f"Minimal NDL {report.get('min_ndl', 'N/A')} minutes."
-    )
+    return _REPORT_TEMPLATE.format_map(_ReportFields(report))
@@ -0,0 +1,11 @@
+import pytest
+
+from src.parsers.subsurface import extract_all_dive_profiles_refined
+
+SSRF_FIXTURE_PATH = "tests/fixtures/anonymized_subsurface_export.ssrf"
+
+
+@pytest.fixture(scope="session")
+def parsed_ssrf_df():
+    """The fixture log parsed once for the whole test session (read-only)."""
+    return extract_all_dive_profiles_refined(SSRF_FIXTURE_PATH)
@@ -38,6 +38,12 @@ def test_get_dive_summary():
     assert "4/5" in result  # rating
 
 
+def test_get_dive_summary_padded_dive_number():
+    result = get_dive_summary("01", _make_dive_data())
+    assert "Reef Site" in result
+    assert "15.0m" in result
+
+
 def test_get_dive_summary_not_found():
     df = _make_dive_data()
     result = get_dive_summary("999", df.to_json())
@@ -52,6 +58,16 @@ def test_analyze_dive_profile_adverse():
     assert "ADVERSE CONDITIONS" in result
 
 
+def test_analyze_dive_profile_verbose_report():
+    df = _make_dive_data()
+    brief = analyze_dive_profile("1", df)
+    full = analyze_dive_profile("1", df, verbose=True)
+
+    assert "Reef Site, max depth 15.0m" in brief
+    assert "Average depth" not in brief
+    assert "Average depth" in full
+
+
 def test_analyze_dive_profile_not_found():
     df = _make_dive_data()
     result = analyze_dive_profile("999", df.to_json())
@@ -85,3 +101,10 @@ def test_analyze_all_dives_empty():
     df = pd.DataFrame()
     result = analyze_all_dives(df.to_json())
     assert "No dive data loaded" in result
+
+
+def test_tools_accept_dataframe():
+    df = _make_dive_data()
+    assert get_dive_summary("1", df) == get_dive_summary("1", df.to_json())
+    assert analyze_dive_profile("2", df) == analyze_dive_profile("2", df.to_json())
+    assert list_dives(df) == list_dives(df.to_json())
@@ -1,6 +1,10 @@
+from unittest.mock import MagicMock, patch
+
 import pytest
 from httpx import ASGITransport, AsyncClient
 
+from src.agent.conversation import DiverRoastAgent
+from src.api.dependencies import SessionStore
 from src.api.main import app
 
 
@@ -48,3 +52,42 @@ async def test_upload_valid_file():
     assert data["dive_count"] > 0
     assert "session_id" in data
     assert len(data["dive_numbers"]) > 0
+
+
+def test_session_store_evicts_least_recently_used():
+    store = SessionStore(maxsize=2, ttl=3600)
+    a, b, c = DiverRoastAgent(), DiverRoastAgent(), DiverRoastAgent()
+    store.set("a", a)
+    store.set("b", b)
+    assert store.get("a") is a  # "b" is now least recently used
+    store.set("c", c)
+    assert store.get("b") is None
+    assert store.get("a") is a
+    assert store.get("c") is c
+
+
+def test_session_store_expires_idle_sessions():
+    store = SessionStore(maxsize=10, ttl=60)
+    with patch("src.api.dependencies.time.monotonic", return_value=1000.0):
+        store.set("a", DiverRoastAgent())
+    with patch("src.api.dependencies.time.monotonic", return_value=1059.0):
+        assert store.get("a") is not None
+    with patch("src.api.dependencies.time.monotonic", return_value=1120.0):
+        assert store.get("a") is None
+        assert len(store) == 0
+
+
+def test_session_store_drops_dashboard_with_session():
+    store = SessionStore(maxsize=1, ttl=3600)
+    dashboard = ("v1", MagicMock())
+    store.set("a", DiverRoastAgent())
+    store.set_dashboard("a", dashboard)
+    assert store.get_dashboard("a") is dashboard
+    store.invalidate_dashboard("a")
+    assert store.get_dashboard("a") is None
+
+    store.set_dashboard("a", dashboard)
+    store.set("b", DiverRoastAgent())  # evicts "a"
+    assert store.get_dashboard("a") is None
+    store.set_dashboard("a", dashboard)  # no longer a live session
+    assert store.get_dashboard("a") is None
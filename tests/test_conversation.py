@@ -0,0 +1,131 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pandas as pd
+import pytest
+from google.genai import types
+from opentelemetry.trace import NoOpTracer
+
+from src.agent.conversation import DiverRoastAgent
+from src.agent.system_prompts import PROMPT_VERSIONS
+
+
+def _text(content: types.Content) -> str:
+    return content.parts[0].text  # type: ignore[index]
+
+
+def _agent_with_exchanges(n: int) -> DiverRoastAgent:
+    agent = DiverRoastAgent()
+    agent.history.append(
+        types.Content(role="user", parts=[types.Part.from_text(text="context")])
+    )
+    agent.history.append(
+        types.Content(role="model", parts=[types.Part.from_text(text="ack")])
+    )
+    for i in range(n):
+        agent._append_user_message(f"question {i}")
+        agent.history.append(
+            types.Content(role="model", parts=[types.Part.from_text(text=f"a{i}")])
+        )
+    return agent
+
+
+def test_request_contents_sends_full_history_under_limit():
+    agent = _agent_with_exchanges(3)
+    assert agent._request_contents() is agent.history
+
+
+def test_request_contents_keeps_context_and_recent_exchanges():
+    agent = _agent_with_exchanges(5)
+    with patch("src.agent.conversation.settings.CHAT_HISTORY_MAX_EXCHANGES", 2):
+        contents = agent._request_contents()
+
+    assert [_text(c) for c in contents] == [
+        "context",
+        "ack",
+        "question 3",
+        "a3",
+        "question 4",
+        "a4",
+    ]
+    assert len(agent.history) == 12
+
+
+def test_request_contents_sends_latest_upload_context(parsed_ssrf_df):
+    agent = _agent_with_exchanges(2)
+    agent.set_dive_data(parsed_ssrf_df)
+    for i in range(2, 6):
+        agent._append_user_message(f"question {i}")
+        agent.history.append(
+            types.Content(role="model", parts=[types.Part.from_text(text=f"a{i}")])
+        )
+    with patch("src.agent.conversation.settings.CHAT_HISTORY_MAX_EXCHANGES", 2):
+        contents = agent._request_contents()
+
+    texts = [_text(c) for c in contents]
+    assert texts[0].startswith("[System: The diver has uploaded a dive log")
+    assert texts[1].startswith("Got it")
+    assert texts[2:] == ["question 4", "a4", "question 5", "a5"]
+    assert "context" not in texts
+
+
+def test_tool_fast_paths_without_rating_column():
+    agent = DiverRoastAgent()
+    agent.dive_data = pd.DataFrame(
+        {
+            "dive_number": ["1", "1", "2"],
+            "dive_site_name": ["Reef", "Reef", "Wall"],
+            "trip_name": ["Trip", "Trip", "Trip"],
+            "depth": [5.0, 12.0, 20.0],
+            "time": [0, 60, 0],
+            "sac_rate": [15.0, 15.0, 18.0],
+        }
+    )
+    agent._build_tool_fast_paths()
+
+    assert agent._dive_list is not None
+    assert "#1: Reef — 12.0m max — rating N/A/5" in agent._dive_list
+    assert agent._dive_summaries["2"].endswith("Rating: N/A/5")
+
+
+@pytest.mark.parametrize("tool", ["get_dive_summary", "analyze_dive_profile"])
+def test_execute_tool_accepts_padded_dive_number(parsed_ssrf_df, tool):
+    agent = DiverRoastAgent()
+    agent.set_dive_data(parsed_ssrf_df)
+    dive = next(dn for dn in agent.get_dive_numbers() if len(dn) == 1)
+
+    padded = agent._execute_tool(
+        types.FunctionCall(name=tool, args={"dive_number": f"0{dive}"})
+    )
+    exact = agent._execute_tool(
+        types.FunctionCall(name=tool, args={"dive_number": dive})
+    )
+
+    assert "No data found" not in padded
+    assert padded.replace(f"Dive 0{dive}", f"Dive {dive}") == exact
+
+
+async def test_chat_stream_rolls_back_history_on_error():
+    agent = _agent_with_exchanges(1)
+    agent._client = SimpleNamespace(
+        aio=SimpleNamespace(
+            models=SimpleNamespace(
+                generate_content_stream=AsyncMock(side_effect=RuntimeError("boom"))
+            )
+        )
+    )
+    before = list(agent.history)
+
+    with (
+        patch("src.agent.conversation.get_tracer", return_value=NoOpTracer()),
+        patch(
+            "src.agent.conversation.get_active_prompt",
+            return_value=PROMPT_VERSIONS[3],
+        ),
+        pytest.raises(RuntimeError),
+    ):
+        async for _ in agent.chat_stream("another question"):
+            pass
+
+    assert agent.history == before
+    assert agent._exchange_starts == [2]
@@ -1,20 +1,23 @@
 from unittest.mock import patch
 
+import numpy as np
+import pandas as pd
 import pytest
 from httpx import ASGITransport, AsyncClient
 
 from src.api.dependencies import get_or_create_session
 from src.api.main import app
 from src.api.routes.dashboard import (
+    _build_diver_profile,
     _classify_experience,
     _classify_ndl_zone,
-    _classify_region,
+    _classify_regions,
     _classify_water_type,
     _classify_zone,
-    _compute_danger_score,
-    _identify_issues,
+    _classify_zones,
+    _danger_scores,
+    _issue_flags,
 )
-from src.parsers import get_parser
 
 
 @pytest.fixture
@@ -23,12 +26,10 @@ def anyio_backend():
 
 
 @pytest.fixture
-def session_with_dives():
+def session_with_dives(parsed_ssrf_df):
     """Create a session with real dive data from the fixture file."""
-    parser = get_parser("export.ssrf")
-    df = parser.parse("tests/fixtures/anonymized_subsurface_export.ssrf")
     sid, agent = get_or_create_session()
-    agent.set_dive_data(df)
+    agent.set_dive_data(parsed_ssrf_df)
     return sid
 
 
@@ -63,7 +64,26 @@ class TestClassifyNdlZone:
         assert _classify_ndl_zone(3.0) == "danger"
 
 
-class TestComputeDangerScore:
+class TestClassifyZones:
+    def test_matches_scalar_classifiers(self):
+        values = np.array([3.0, 5.0, 7.0, 10.0, 15.0, 18.0, 25.0, 30.0, 35.0])
+        assert _classify_zones("max_depth", values, 18.0, 30.0).tolist() == [
+            _classify_zone(v, 18.0, 30.0) for v in values
+        ]
+        assert _classify_zones("min_ndl", values, None, None).tolist() == [
+            _classify_ndl_zone(v) for v in values
+        ]
+
+    def test_temperature(self):
+        values = np.array([8.0, 10.0, 26.0])
+        assert _classify_zones("avg_temp", values, None, None).tolist() == [
+            "warning",
+            "safe",
+            "safe",
+        ]
+
+
+class TestDangerScores:
     def test_safe_dive(self):
         row = {
             "min_ndl": 20,
@@ -72,7 +92,7 @@ class TestComputeDangerScore:
             "max_depth": 10,
             "adverse_conditions": 0,
         }
-        assert _compute_danger_score(row) == 0.0
+        assert float(_danger_scores(row)) == 0.0
 
     def test_all_danger(self):
         row = {
@@ -82,7 +102,7 @@ class TestComputeDangerScore:
             "max_depth": 40,
             "adverse_conditions": 1,
         }
-        score = _compute_danger_score(row)
+        score = float(_danger_scores(row))
         # NDL danger: 3*2=6, ascent danger: 2*2=4, SAC danger: 1*2=2, depth danger: 1*2=2, adverse: 5
         assert score == 19.0
 
@@ -94,12 +114,25 @@ class TestComputeDangerScore:
             "max_depth": 25,
             "adverse_conditions": 0,
         }
-        score = _compute_danger_score(row)
+        score = float(_danger_scores(row))
         # NDL warning: 3, ascent warning: 2, SAC warning: 1, depth warning: 1
         assert score == 7.0
 
-
-class TestIdentifyIssues:
+    def test_scores_every_row_of_a_frame(self):
+        df = pd.DataFrame(
+            {
+                "min_ndl": [20, 2, 7],
+                "max_ascend_speed": [5, 15, 9.5],
+                "sac_rate": [10, 25, 17],
+                "max_depth": [10, 40, 25],
+                "adverse_conditions": [0, 1, 0],
+            }
+        )
+        # Same rows as the safe, all-danger and warning cases above
+        assert _danger_scores(df).tolist() == [0.0, 19.0, 7.0]
+
+
+class TestIssueFlags:
     def test_no_issues(self):
         row = {
             "max_ascend_speed": 5,
@@ -108,7 +141,7 @@ class TestIdentifyIssues:
             "max_depth": 10,
             "adverse_conditions": 0,
         }
-        assert _identify_issues(row) == []
+        assert not _issue_flags(row).any()
 
     def test_multiple_issues(self):
         row = {
@@ -118,12 +151,10 @@ class TestIdentifyIssues:
             "max_depth": 35,
             "adverse_conditions": 1,
         }
-        issues = _identify_issues(row)
-        assert "rapid ascent" in issues
-        assert "low NDL" in issues
-        assert "high air consumption" in issues
-        assert "deep dive" in issues
-        assert "adverse conditions" in issues
+        flags = _issue_flags(row)
+        # ISSUE_NAMES order: rapid ascent, low NDL, high air consumption,
+        # deep dive, adverse conditions
+        assert flags.tolist() == [True, True, True, True, True]
 
 
 class TestClassifyWaterType:
@@ -137,15 +168,25 @@ class TestClassifyWaterType:
         assert _classify_water_type(8.0) == "Cold water"
 
 
-class TestClassifyRegion:
+def _regions(*coords: tuple[float, float]) -> set[str]:
+    lats, lons = (np.array(c, dtype=float) for c in zip(*coords, strict=True))
+    return _classify_regions(lats, lons)
+
+
+class TestClassifyRegions:
     def test_red_sea(self):
-        assert _classify_region(27.0, 34.0) == "Red Sea"
+        assert _regions((27.0, 34.0)) == {"Red Sea"}
 
     def test_caribbean(self):
-        assert _classify_region(18.0, -65.0) == "Caribbean"
+        assert _regions((18.0, -65.0)) == {"Caribbean"}
 
     def test_unknown(self):
-        assert _classify_region(0.0, 0.0) is None
+        assert _regions((0.0, 0.0)) == set()
+
+    def test_overlapping_boxes_use_first_listed_region(self):
+        # (15, -85) is inside both the Caribbean and Central America boxes
+        coords = [(27.0, 34.0), (18.0, -65.0), (0.0, 0.0), (15.0, -85.0)]
+        assert _regions(*coords) == {"Red Sea", "Caribbean"}
 
 
 class TestClassifyExperience:
@@ -162,6 +203,34 @@ class TestClassifyExperience:
         assert _classify_experience(150, 15.0) == "advanced"
 
 
+class TestBuildDiverProfile:
+    def test_keywords_sites_and_regions(self):
+        df = pd.DataFrame(
+            {
+                "dive_site_name": ["Blue Lacave", "N/A", "Blue Lacave", "Old Quarry"],
+                "trip_name": ["Trip A", "Wreck Week", "Trip A", "Trip B"],
+                "avg_temp": [27.0, 0.0, 27.0, 8.0],
+                "max_depth": [12.0, 20.0, 12.0, 26.0],
+                "latitude": [27.0, 0.0, 27.0, 0.0],
+                "longitude": [34.0, 0.0, 34.0, 0.0],
+            }
+        )
+        profile = _build_diver_profile(df)
+
+        # "lacave" holds both "lac" and "cave"
+        assert profile.water_types == [
+            "Cave",
+            "Cold water",
+            "Lake",
+            "Quarry",
+            "Tropical",
+            "Wreck",
+        ]
+        assert profile.dive_sites == ["Blue Lacave", "Old Quarry"]
+        assert profile.regions == ["Red Sea"]
+        assert profile.experience_level == "intermediate"
+
+
 # --- Route integration tests ---
 
 
@@ -257,3 +326,112 @@ async def test_dashboard_success(mock_summaries, session_with_dives):
     assert "experience_level" in profile
     assert "dive_sites" in profile
     assert profile["experience_level"] in ("beginner", "intermediate", "advanced")
+
+
+@pytest.mark.anyio
+@patch(
+    "src.api.routes.dashboard._generate_dive_summaries",
+    return_value=["Summary 1.", "Summary 2.", "Summary 3."],
+)
+async def test_dashboard_reuses_session_features(mock_summaries, session_with_dives):
+    sid = session_with_dives
+    transport = ASGITransport(app=app)
+
+    with patch("src.api.routes.dashboard.extract_features") as mock_extract:
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(f"/api/dashboard/{sid}")
+
+    assert response.status_code == 200
+    mock_extract.assert_not_called()
+
+
+@pytest.mark.anyio
+@patch(
+    "src.api.routes.dashboard._generate_dive_summaries",
+    return_value=["Summary 1.", "Summary 2.", "Summary 3."],
+)
+async def test_dashboard_cached_until_upload(mock_summaries, session_with_dives):
+    sid = session_with_dives
+    transport = ASGITransport(app=app)
+
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.get(f"/api/dashboard/{sid}")
+        etag = first.headers["etag"]
+        again = await client.get(f"/api/dashboard/{sid}")
+        not_modified = await client.get(
+            f"/api/dashboard/{sid}", headers={"If-None-Match": etag}
+        )
+        with open("tests/fixtures/anonymized_subsurface_export.ssrf", "rb") as f:
+            uploaded = await client.post(
+                "/api/upload",
+                data={"session_id": sid},
+                files={"file": ("export.ssrf", f.read(), "application/xml")},
+            )
+        rebuilt = await client.get(
+            f"/api/dashboard/{sid}", headers={"If-None-Match": etag}
+        )
+
+    assert again.json() == first.json()
+    assert again.headers["etag"] == etag
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert uploaded.status_code == 200
+    assert rebuilt.status_code == 200
+    assert rebuilt.headers["etag"] != etag
+    assert mock_summaries.call_count == 2
+
+
+@pytest.mark.anyio
+async def test_dashboard_not_cached_when_summaries_fall_back(session_with_dives):
+    sid = session_with_dives
+    transport = ASGITransport(app=app)
+
+    with patch(
+        "src.api.routes.dashboard.get_client", side_effect=RuntimeError("Gemini down")
+    ) as mock_client:
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            first = await client.get(f"/api/dashboard/{sid}")
+            retried = await client.get(
+                f"/api/dashboard/{sid}",
+                headers={"If-None-Match": first.headers["etag"]},
+            )
+
+    assert first.status_code == 200
+    assert first.json()["top_problematic_dives"][0]["summary"].startswith("Dive #")
+    assert retried.status_code == 200
+    assert retried.headers["etag"] != first.headers["etag"]
+    assert mock_client.call_count == 2
+
+    with patch(
+        "src.api.routes.dashboard._generate_dive_summaries",
+        return_value=["Summary 1.", "Summary 2.", "Summary 3."],
+    ) as mock_summaries:
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            recovered = await client.get(f"/api/dashboard/{sid}")
+            cached = await client.get(f"/api/dashboard/{sid}")
+
+    assert recovered.json()["top_problematic_dives"][0]["summary"] == "Summary 1."
+    assert cached.headers["etag"] == recovered.headers["etag"]
+    assert mock_summaries.call_count == 1
+
+
+@pytest.mark.anyio
+@patch(
+    "src.api.routes.dashboard._generate_dive_summaries",
+    return_value=["Summary 1.", "Summary 2.", "Summary 3."],
+)
+async def test_dashboard_summary_omits_per_dive(mock_summaries, session_with_dives):
+    sid = session_with_dives
+    transport = ASGITransport(app=app)
+
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        full = await client.get(f"/api/dashboard/{sid}")
+        summary = await client.get(f"/api/dashboard/{sid}?summary=1")
+
+    assert all(m["per_dive"] for m in full.json()["metrics"])
+    assert all(m["per_dive"] == [] for m in summary.json()["metrics"])
+    assert (
+        summary.json()["metrics"][0]["max_val"] == full.json()["metrics"][0]["max_val"]
+    )
+    assert summary.headers["etag"] != full.headers["etag"]
+    assert mock_summaries.call_count == 1
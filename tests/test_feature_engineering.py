@@ -1,11 +1,6 @@
-import xml.etree.ElementTree as ET
-
 import pandas as pd
 
 from src.analysis.feature_engineering import calculate_ascend_speed, extract_features
-from src.parsers.subsurface import extract_all_dive_profiles_refined
-
-FIXTURE_PATH = "tests/fixtures/anonymized_subsurface_export.ssrf"
 
 
 def test_calculate_ascend_speed():
@@ -44,14 +39,8 @@ def test_calculate_ascend_speed():
     pd.testing.assert_frame_equal(result, expected_output)
 
 
-def test_extract_features():
-    # Load the XML file
-    with open(FIXTURE_PATH) as file:
-        tree = ET.parse(file)
-        root = tree.getroot()
-
-    data = extract_all_dive_profiles_refined(root)
-    features = extract_features(data)
+def test_extract_features(parsed_ssrf_df):
+    features = extract_features(parsed_ssrf_df)
 
     assert not features.empty, "The features dataframe is empty"
     expected_columns = {
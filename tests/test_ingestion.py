@@ -0,0 +1,20 @@
+import pytest
+
+from src.rag.ingestion import _get_splitter, chunk_text
+
+
+def test_chunk_text_reuses_splitter_per_configuration():
+    text = "word " * 1000
+    chunks = chunk_text(text, chunk_size=500, chunk_overlap=50)
+    assert chunk_text(text, chunk_size=500, chunk_overlap=50) == chunks
+    assert all(len(chunk) <= 500 for chunk in chunks)
+    assert _get_splitter(500, 50) is _get_splitter(500, 50)
+
+
+@pytest.mark.parametrize(
+    "text", ["", "  \n ", " Short post.\n\nTwo lines. ", "x" * 500]
+)
+def test_chunk_text_short_text_matches_splitter(text):
+    assert chunk_text(text, chunk_size=500, chunk_overlap=50) == _get_splitter(
+        500, 50
+    ).split_text(text)
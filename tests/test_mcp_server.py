@@ -1,3 +1,5 @@
+from unittest.mock import MagicMock, patch
+
 import pandas as pd
 import pytest
 
@@ -7,6 +9,7 @@ from src.mcp.server import (
     analyze_dive_profile,
     get_dive_summary,
     list_dives,
+    parse_dive_log,
 )
 
 
@@ -29,9 +32,13 @@ def _make_dive_data():
     )
 
 
-@pytest.fixture(autouse=True)
+@pytest.fixture(scope="module", autouse=True)
 def _load_dive_data():
-    """Load sample data into MCP session state before each test."""
+    """Load sample data into MCP session state once for the module.
+
+    Tools only read it; tests that replace it use monkeypatch so the shared
+    frame is restored afterwards.
+    """
     mcp_mod._dive_data = _make_dive_data()
     yield
     mcp_mod._dive_data = None
@@ -51,6 +58,12 @@ def test_filter_dive_int_fallback():
     assert len(result) == 5
 
 
+def test_filter_dive_reuses_split_for_same_frame():
+    df = _make_dive_data()
+    assert _filter_dive(df, "1") is _filter_dive(df, "1")
+    assert _filter_dive(df, "3").empty
+
+
 def test_get_dive_summary():
     result = get_dive_summary("1")
     assert "Dive 1" in result
@@ -74,6 +87,17 @@ def test_analyze_dive_profile_clean():
     assert "No major safety issues" in result
 
 
+def test_analyze_dive_profile_reuses_features(monkeypatch):
+    # A frame no other test has analyzed, so the first call is a cache miss
+    monkeypatch.setattr(mcp_mod, "_dive_data", _make_dive_data())
+    with patch(
+        "src.mcp.server.extract_features", wraps=mcp_mod.extract_features
+    ) as mock_extract:
+        first = analyze_dive_profile("2")
+        assert analyze_dive_profile("2") == first
+    assert mock_extract.call_count == 1
+
+
 def test_list_dives():
     result = list_dives()
     assert "2" in result
@@ -81,7 +105,31 @@ def test_list_dives():
     assert "15.0m" in result
 
 
-def test_no_dive_data_raises():
-    mcp_mod._dive_data = None
+def test_list_dives_reuses_listing_until_new_data(monkeypatch):
+    first = list_dives()
+    assert list_dives() is first
+    monkeypatch.setattr(
+        mcp_mod, "_dive_data", _make_dive_data().assign(dive_site_name="Wreck")
+    )
+    assert "Wreck" in list_dives()
+
+
+def test_no_dive_data_raises(monkeypatch):
+    monkeypatch.setattr(mcp_mod, "_dive_data", None)
     with pytest.raises(ValueError, match="No dive log loaded"):
         list_dives()
+
+
+def test_parse_dive_log_caps_listed_dive_numbers(monkeypatch):
+    df = pd.concat(
+        [_make_dive_data().assign(dive_number=str(i)) for i in range(60)],
+        ignore_index=True,
+    )
+    parser = MagicMock()
+    parser.parse.return_value = df
+    # parse_dive_log replaces the module state; restore it afterwards
+    monkeypatch.setattr(mcp_mod, "_dive_data", mcp_mod._dive_data)
+    with patch("src.mcp.server.get_parser", return_value=parser):
+        result = parse_dive_log("log.ssrf")
+    assert result.startswith("Parsed 60 dives: 0, 1, 10,")
+    assert "... and 10 more" in result
@@ -8,20 +8,16 @@ from src.parsers.subsurface import extract_all_dive_profiles_refined, time_to_mi
 FIXTURE_PATH = "tests/fixtures/anonymized_subsurface_export.ssrf"
 
 
-def test_time_to_minutes():
-    assert time_to_minutes("1:30") == 90
-    assert time_to_minutes("0:45") == 45
-    assert time_to_minutes("2:00") == 120
-    assert time_to_minutes("60") == 60.0
-    assert time_to_minutes("90") == 90.0
+@pytest.mark.parametrize(
+    "value,expected",
+    [("1:30", 90), ("0:45", 45), ("2:00", 120), ("60", 60.0), ("90", 90.0)],
+)
+def test_time_to_minutes(value, expected):
+    assert time_to_minutes(value) == expected
 
 
-def test_extract_all_dive_profiles_refined():
-    with open(FIXTURE_PATH) as file:
-        tree = ET.parse(file)
-        root = tree.getroot()
-
-    df = extract_all_dive_profiles_refined(root)
+def test_extract_all_dive_profiles_refined(parsed_ssrf_df):
+    df = parsed_ssrf_df
 
     assert not df.empty, "The dataframe is empty"
     assert set(df.columns) == {
@@ -40,22 +36,35 @@ def test_extract_all_dive_profiles_refined():
         "longitude",
     }
     assert len(df) == 37882, "Dataframe should have 37882 rows"
-    assert df["depth"].iloc[200] == 4.7
-    assert df["rating"].iloc[200] == 4
-    assert df["sac_rate"].iloc[200] == 41.418
-    assert df["time"].iloc[200] == 720
+    row = df.iloc[200]
+    assert row["depth"] == 4.7
+    assert row["rating"] == 4
+    assert row["sac_rate"] == 41.418
+    assert row["time"] == 720
 
 
-def test_get_parser_ssrf():
-    parser = get_parser("dive_export.ssrf")
-    assert parser.__class__.__name__ == "SubsurfaceParser"
+def test_subsurface_parser_accepts_file_object(parsed_ssrf_df):
+    parser = get_parser(FIXTURE_PATH)
+    with open(FIXTURE_PATH, "rb") as file:
+        from_file = parser.parse(file)
+    assert from_file.equals(parsed_ssrf_df)
+
 
+def test_extract_from_parsed_root_matches_streaming(parsed_ssrf_df):
+    root = ET.parse(FIXTURE_PATH).getroot()
+    assert extract_all_dive_profiles_refined(root).equals(parsed_ssrf_df)
 
-def test_get_parser_xml():
-    parser = get_parser("dive_export.xml")
+
+@pytest.mark.parametrize("filename", ["dive_export.ssrf", "dive_export.xml"])
+def test_get_parser_supported(filename):
+    parser = get_parser(filename)
     assert parser.__class__.__name__ == "SubsurfaceParser"
 
 
+def test_get_parser_reuses_instance_case_insensitively():
+    assert get_parser("a.ssrf") is get_parser("B.SSRF")
+
+
 def test_get_parser_unsupported():
     with pytest.raises(ValueError, match="Unsupported file type"):
         get_parser("dive_export.csv")
@@ -66,8 +75,9 @@ def test_parser_registry_keys():
     assert ".xml" in PARSER_REGISTRY
 
 
-def test_subsurface_parser_parse():
+def test_subsurface_parser_parse(parsed_ssrf_df):
     parser = get_parser(FIXTURE_PATH)
     df = parser.parse(FIXTURE_PATH)
     assert not df.empty
     assert len(df) == 37882
+    assert df.equals(parsed_ssrf_df)
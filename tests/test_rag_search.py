@@ -1,13 +1,22 @@
-from unittest.mock import MagicMock
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
 
 import pandas as pd
+import pyarrow as pa
+import pytest
 
-from src.rag.search import create_text_report, hybrid_search
+from src.rag.search import (
+    _connect,
+    create_text_report,
+    hybrid_search,
+    search_dan_articles,
+)
 
 
-def test_hybrid_search():
-    mock_table = MagicMock()
-    mock_results = pd.DataFrame(
+@pytest.fixture(scope="module")
+def ranked_results():
+    """Reranked hybrid results as LanceDB returns them, best first."""
+    return pa.table(
         {
             "value": [
                 "DAN incident report about rapid ascent",
@@ -17,48 +26,71 @@ def test_hybrid_search():
             "_relevance_score": [0.9, 0.8, 0.7],
         }
     )
-    mock_table.search.return_value.to_pandas.return_value = mock_results
 
-    context = hybrid_search(mock_table, "diving safety", top_k=2)
+
+@pytest.mark.parametrize("top_k", [1, 2])
+def test_hybrid_search(ranked_results, top_k):
+    mock_table = MagicMock()
+    mock_table.search.return_value.limit.side_effect = lambda k: SimpleNamespace(
+        to_arrow=lambda: ranked_results.slice(0, k)
+    )
+
+    context = hybrid_search(mock_table, "diving safety", top_k=top_k)
 
     mock_table.search.assert_called_once_with("diving safety", query_type="hybrid")
-    assert "DAN incident report about rapid ascent" in context
-    assert "Safety guidelines for deep diving" in context
+    mock_table.search.return_value.limit.assert_called_once_with(top_k)
+    assert context.splitlines() == ranked_results["value"].to_pylist()[:top_k]
 
 
-def test_hybrid_search_top_k():
+def test_search_dan_articles_dedupes_urls_and_truncates():
     mock_table = MagicMock()
-    mock_results = pd.DataFrame(
-        {
-            "value": ["result1", "result2", "result3"],
-            "_relevance_score": [0.9, 0.8, 0.7],
-        }
+    mock_table.search.return_value.limit.return_value.to_pandas.return_value = (
+        pd.DataFrame(
+            {
+                "value": ["First sentence. Second one.", "Also a.", "x" * 200],
+                "title": ["A", "A again", "B"],
+                "url": ["https://dan.org/a", "https://dan.org/a", ""],
+                "_relevance_score": [0.9, 0.8, 0.7],
+            }
+        )
     )
-    mock_table.search.return_value.to_pandas.return_value = mock_results
+    _connect.cache_clear()
+    with patch("src.rag.search.lancedb.connect") as mock_connect:
+        mock_connect.return_value.open_table.return_value = mock_table
+        articles = search_dan_articles("ascent", top_k=3)
+        search_dan_articles("ascent", top_k=3)
+    _connect.cache_clear()
 
-    context = hybrid_search(mock_table, "query", top_k=1)
-    assert "result1" in context
+    # One connection, but the table is reopened to see new versions
+    mock_connect.assert_called_once()
+    assert mock_connect.return_value.open_table.call_count == 2
 
-
-def test_create_text_report():
-    report = {
-        "avg_depth": 15.8,
-        "max_depth": 20,
-        "depth_variability": 7.4,
-        "sac_rate": 15,
-        "high_ascend_speed_count": 1,
-        "max_ascend_speed": 13,
-        "min_ndl": 14,
-    }
-    text = create_text_report(report)
-    assert "15.8" in text
-    assert "20" in text
-    assert "SAC rate 15" in text
-    assert "Minimal NDL 14 minutes" in text
+    assert articles == [
+        {"title": "A", "url": "https://dan.org/a", "snippet": "First sentence."},
+        {"title": "B", "url": "", "snippet": "x" * 147 + "..."},
+    ]
 
 
-def test_create_text_report_missing_keys():
-    report = {"avg_depth": 10.0}
+@pytest.mark.parametrize(
+    "report,expected",
+    [
+        (
+            {
+                "avg_depth": 15.8,
+                "max_depth": 20,
+                "depth_variability": 7.4,
+                "sac_rate": 15,
+                "high_ascend_speed_count": 1,
+                "max_ascend_speed": 13,
+                "min_ndl": 14,
+            },
+            ("15.8", "20", "SAC rate 15", "Minimal NDL 14 minutes"),
+        ),
+        ({"avg_depth": 10.0}, ("10.0", "N/A")),
+    ],
+    ids=["complete", "missing-keys"],
+)
+def test_create_text_report(report, expected):
     text = create_text_report(report)
-    assert "10.0" in text
-    assert "N/A" in text
+    for token in expected:
+        assert token in text
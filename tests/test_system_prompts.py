@@ -1,15 +1,39 @@
 """Tests for system prompt loading with Phoenix fallback."""
 
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 from src.agent.system_prompts import (
     PROMPT_VERSIONS,
     PromptVersion,
     get_active_prompt,
     get_prompt_from_phoenix,
+    invalidate_active_prompt,
 )
 
 
+@pytest.fixture(autouse=True)
+def _reset_prompt_cache():
+    invalidate_active_prompt()
+    yield
+    invalidate_active_prompt()
+
+
+@pytest.fixture
+def phoenix_client():
+    """Patch the Phoenix client class and yield the client instance it returns."""
+    mock_client = MagicMock()
+    with patch("phoenix.client.Client", return_value=mock_client):
+        yield mock_client
+
+
+def _phoenix_prompt(version_id: str, messages: list[dict]) -> SimpleNamespace:
+    formatted = SimpleNamespace(messages=messages)
+    return SimpleNamespace(id=version_id, format=lambda: formatted)
+
+
 class TestGetPromptFromPhoenix:
     """Tests for Phoenix prompt fetching."""
 
@@ -22,49 +46,66 @@ class TestGetPromptFromPhoenix:
             result = get_prompt_from_phoenix()
             assert result is None
 
-    def test_returns_none_when_prompt_not_found(self):
+    def test_returns_none_when_prompt_not_found(self, phoenix_client):
         """When the prompt doesn't exist in Phoenix, returns None."""
-        mock_client = MagicMock()
-        mock_client.prompts.get.side_effect = Exception("Prompt not found")
-        with patch("phoenix.client.Client", return_value=mock_client):
-            result = get_prompt_from_phoenix()
-            assert result is None
+        phoenix_client.prompts.get.side_effect = Exception("Prompt not found")
+        assert get_prompt_from_phoenix() is None
 
-    def test_returns_prompt_version_on_success(self):
+    def test_returns_prompt_version_on_success(self, phoenix_client):
         """When Phoenix returns a valid prompt, returns a PromptVersion."""
-        mock_formatted = MagicMock()
-        mock_formatted.messages = [
-            {"role": "system", "content": "You are DiveRoast, a test prompt."}
-        ]
-        mock_prompt = MagicMock()
-        mock_prompt.id = "phoenix-version-abc123"
-        mock_prompt.format.return_value = mock_formatted
-
-        mock_client = MagicMock()
-        mock_client.prompts.get.return_value = mock_prompt
-
-        with patch("phoenix.client.Client", return_value=mock_client):
-            result = get_prompt_from_phoenix()
-            assert result is not None
-            assert isinstance(result, PromptVersion)
-            assert result.prompt == "You are DiveRoast, a test prompt."
-            assert result.phoenix_version_id == "phoenix-version-abc123"
-            assert result.label == "phoenix-production"
+        phoenix_client.prompts.get.return_value = _phoenix_prompt(
+            "phoenix-version-abc123",
+            [{"role": "system", "content": "You are DiveRoast, a test prompt."}],
+        )
 
-    def test_returns_none_when_no_system_message(self):
-        """When Phoenix prompt has no system message, returns None."""
-        mock_formatted = MagicMock()
-        mock_formatted.messages = [{"role": "user", "content": "Hello"}]
-        mock_prompt = MagicMock()
-        mock_prompt.id = "phoenix-version-xyz"
-        mock_prompt.format.return_value = mock_formatted
+        result = get_prompt_from_phoenix()
+        assert result is not None
+        assert isinstance(result, PromptVersion)
+        assert result.prompt == "You are DiveRoast, a test prompt."
+        assert result.phoenix_version_id == "phoenix-version-abc123"
+        assert result.label == "phoenix-production"
+
+    def test_joins_structured_system_content(self, phoenix_client):
+        """Structured system content blocks are joined into one prompt."""
+        phoenix_client.prompts.get.return_value = _phoenix_prompt(
+            "phoenix-version-blocks",
+            [
+                {"role": "user", "content": "Hello"},
+                {
+                    "role": "system",
+                    "content": [
+                        {"type": "text", "text": "You are DiveRoast, "},
+                        {"type": "text", "text": "a test prompt."},
+                    ],
+                },
+            ],
+        )
 
-        mock_client = MagicMock()
-        mock_client.prompts.get.return_value = mock_prompt
+        result = get_prompt_from_phoenix()
+        assert result is not None
+        assert result.prompt == "You are DiveRoast, a test prompt."
 
-        with patch("phoenix.client.Client", return_value=mock_client):
-            result = get_prompt_from_phoenix()
-            assert result is None
+    def test_returns_none_when_no_system_message(self, phoenix_client):
+        """When Phoenix prompt has no system message, returns None."""
+        phoenix_client.prompts.get.return_value = _phoenix_prompt(
+            "phoenix-version-xyz", [{"role": "user", "content": "Hello"}]
+        )
+        assert get_prompt_from_phoenix() is None
+
+    def test_caches_result_between_calls(self, phoenix_client):
+        """Repeated lookups within the TTL don't go back to Phoenix."""
+        phoenix_client.prompts.get.side_effect = Exception("Prompt not found")
+        assert get_prompt_from_phoenix() is None
+        assert get_prompt_from_phoenix() is None
+        assert phoenix_client.prompts.get.call_count == 1
+
+    def test_invalidate_forces_refetch(self, phoenix_client):
+        """invalidate_active_prompt() makes the next lookup go to Phoenix."""
+        phoenix_client.prompts.get.side_effect = Exception("Prompt not found")
+        get_prompt_from_phoenix()
+        invalidate_active_prompt()
+        get_prompt_from_phoenix()
+        assert phoenix_client.prompts.get.call_count == 2
 
 
 class TestGetActivePrompt: